@@ -0,0 +1,230 @@
+import queue
+import time
+import traceback
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from agents.dqn_agent import DQNAgent, DQNNetwork, ObservationEncoder, configure_threads
+from env.vector_env import WumpusVectorEnv
+
+
+def state_dim_for(observation_space):
+    """Length of the flat state vector built by DQNAgent.preprocess_state"""
+    return ObservationEncoder(observation_space).state_dim
+
+
+def actor_epsilons(num_actors, base=0.4, alpha=7.0):
+    """Fixed per-actor exploration rates as in Ape-X (base ** (1 + alpha * i / (N - 1)))"""
+    if num_actors == 1:
+        return [base]
+    return [base ** (1 + alpha * i / (num_actors - 1)) for i in range(num_actors)]
+
+
+class TransitionChunks:
+    """Shared-memory slots that actors fill with transitions for the learner.
+
+    Each slot holds `chunk_size` transitions. An actor takes a free slot,
+    writes into it in place and posts (actor_id, slot, count, returns) on
+    the full queue; the learner copies the slot into its replay buffer and
+    hands the slot back on that actor's free queue. No transition data goes
+    through a pipe.
+    """
+
+    def __init__(self, num_slots, chunk_size, state_dim):
+        self.chunk_size = chunk_size
+        self.states = torch.zeros((num_slots, chunk_size, state_dim)).share_memory_()
+        self.actions = torch.zeros((num_slots, chunk_size), dtype=torch.int64).share_memory_()
+        self.rewards = torch.zeros((num_slots, chunk_size)).share_memory_()
+        self.next_states = torch.zeros((num_slots, chunk_size, state_dim)).share_memory_()
+        self.dones = torch.zeros((num_slots, chunk_size)).share_memory_()
+
+    def write(self, slot, start, states, actions, rewards, next_states, dones):
+        end = start + len(actions)
+        self.states[slot, start:end] = torch.from_numpy(states)
+        self.actions[slot, start:end] = torch.from_numpy(actions)
+        self.rewards[slot, start:end] = torch.from_numpy(rewards.astype(np.float32))
+        self.next_states[slot, start:end] = torch.from_numpy(next_states)
+        self.dones[slot, start:end] = torch.from_numpy(dones.astype(np.float32))
+
+    def read(self, slot, count):
+        return (self.states[slot, :count].numpy(), self.actions[slot, :count].numpy(),
+                self.rewards[slot, :count].numpy(), self.next_states[slot, :count].numpy(),
+                self.dones[slot, :count].numpy())
+
+
+def run_actor(actor_id, shared_net, weights_lock, weights_version, chunks, free_slots,
+              full_slots, stop_event, epsilon, envs_per_actor, env_kwargs, seed,
+              network_backend='eager'):
+    """Worker process: step a batch of worlds with a synced copy of the policy.
+
+    An exception is sent to the learner as a (actor_id, None, 0, traceback)
+    message before the process exits.
+    """
+    try:
+        actor_loop(actor_id, shared_net, weights_lock, weights_version, chunks, free_slots,
+                   full_slots, stop_event, epsilon, envs_per_actor, env_kwargs, seed,
+                   network_backend)
+    except Exception:
+        full_slots.put((actor_id, None, 0, traceback.format_exc()))
+        raise
+
+
+def actor_loop(actor_id, shared_net, weights_lock, weights_version, chunks, free_slots,
+               full_slots, stop_event, epsilon, envs_per_actor, env_kwargs, seed, network_backend):
+    # One intra- and inter-op thread per actor so actors and learner don't oversubscribe
+    configure_threads(1, 1)
+    venv = WumpusVectorEnv(envs_per_actor, seed=seed, **env_kwargs)
+    agent = DQNAgent(None, venv.single_action_space.n, memory_size=1,
+                     observation_space=venv.single_observation_space,
+                     network_backend=network_backend)
+    agent.rng = np.random.default_rng(seed)
+    agent.epsilon = epsilon
+
+    local_version = -1
+    obs, _ = venv.reset()
+    # Preallocated state batches, reused every step
+    states = agent.preprocess_batch(obs)
+    next_obs_states = np.empty_like(states)
+    next_states = np.empty_like(states)
+    slot, fill, returns = None, 0, []
+
+    while not stop_event.is_set():
+        if weights_version.value != local_version:
+            with weights_lock:
+                agent.policy_net.load_state_dict(shared_net.state_dict())
+                local_version = weights_version.value
+
+        actions = agent.act_batch(states)
+        obs, rewards, terminations, truncations, infos = venv.step(actions)
+        agent.preprocess_batch(obs, out=next_obs_states)
+        next_states[:] = next_obs_states
+        done = terminations | truncations
+        for i in np.flatnonzero(done):
+            agent.preprocess_state(infos['final_obs'][i], out=next_states[i])
+        if done.any():
+            returns.extend(infos['episode']['r'][done].tolist())
+
+        while slot is None:
+            try:
+                slot = free_slots.get(timeout=0.1)
+            except queue.Empty:
+                if stop_event.is_set():
+                    return
+        # Only true terminations stop bootstrapping; time-limit truncation does not
+        chunks.write(slot, fill, states, actions, rewards, next_states, terminations)
+        fill += len(actions)
+        if fill + envs_per_actor > chunks.chunk_size:
+            full_slots.put((actor_id, slot, fill, returns))
+            slot, fill, returns = None, 0, []
+
+        states, next_obs_states = next_obs_states, states
+
+
+def check_actors(actors):
+    """Raise if an actor process has exited (actors only stop when the learner tells them to)"""
+    for actor_id, actor in enumerate(actors):
+        if not actor.is_alive():
+            raise RuntimeError(f"Actor {actor_id} exited with code {actor.exitcode}")
+
+
+def train_actor_learner(num_actors=4, envs_per_actor=16, total_steps=200000,
+                        chunk_size=256, slots_per_actor=4, learning_starts=1000,
+                        sync_interval=50, target_update_interval=500, env_kwargs=None,
+                        seed=0, agent_kwargs=None):
+    """Train a DQNAgent with parallel actor processes and one learner.
+
+    Actors step their own WumpusVectorEnv worlds with a copy of the policy
+    network that is re-synced from shared memory every `sync_interval`
+    learner updates, and stream transitions through TransitionChunks. The
+    learner (this process) moves finished chunks into the agent's replay
+    buffer and keeps calling replay() until `total_steps` env steps have
+    been collected. Returns (agent, results). Raises RuntimeError with the
+    actor's traceback (or exit code) as soon as an actor fails or exits.
+    """
+    if chunk_size < envs_per_actor:
+        raise ValueError("chunk_size must hold at least one step of every actor world")
+    env_kwargs = env_kwargs or {}
+    ctx = mp.get_context('spawn')
+    probe = WumpusVectorEnv(1, **env_kwargs)
+    state_dim = state_dim_for(probe.single_observation_space)
+    action_dim = probe.single_action_space.n
+    agent = DQNAgent(state_dim, action_dim, observation_space=probe.single_observation_space,
+                     **(agent_kwargs or {}))
+
+    shared_net = DQNNetwork(state_dim, action_dim)
+    shared_net.load_state_dict(agent.policy_net.state_dict())
+    shared_net.share_memory()
+    weights_lock = ctx.Lock()
+    weights_version = ctx.Value('i', 0)
+
+    chunks = TransitionChunks(num_actors * slots_per_actor, chunk_size, state_dim)
+    free_queues = [ctx.Queue() for _ in range(num_actors)]
+    full_slots = ctx.Queue()
+    stop_event = ctx.Event()
+    for actor_id, free_slots in enumerate(free_queues):
+        for k in range(slots_per_actor):
+            free_slots.put(actor_id * slots_per_actor + k)
+
+    actors = [
+        ctx.Process(target=run_actor, daemon=True, args=(
+            actor_id, shared_net, weights_lock, weights_version, chunks,
+            free_queues[actor_id], full_slots, stop_event, epsilon,
+            envs_per_actor, env_kwargs, seed + actor_id, agent.network_backend))
+        for actor_id, epsilon in enumerate(actor_epsilons(num_actors))
+    ]
+    for actor in actors:
+        actor.start()
+
+    episode_rewards = []
+    env_steps = 0
+    updates = 0
+    start_time = time.time()
+    try:
+        while env_steps < total_steps:
+            # Move every finished chunk into replay; block only while warming up
+            block = len(agent.memory) < learning_starts
+            while True:
+                try:
+                    actor_id, slot, count, returns = full_slots.get(block=block, timeout=1.0)
+                except queue.Empty:
+                    check_actors(actors)
+                    break
+                if slot is None:
+                    raise RuntimeError(f"Actor {actor_id} failed:\n{returns}")
+                agent.memory.add_batch(*chunks.read(slot, count))
+                free_queues[actor_id].put(slot)
+                env_steps += count
+                episode_rewards.extend(returns)
+                block = False
+
+            if len(agent.memory) < max(learning_starts, agent.batch_size):
+                continue
+
+            agent.replay()
+            updates += 1
+            if updates % sync_interval == 0:
+                with weights_lock:
+                    shared_net.load_state_dict(agent.policy_net.state_dict())
+                    weights_version.value += 1
+            if updates % target_update_interval == 0:
+                agent.update_target_network()
+    finally:
+        stop_event.set()
+        for actor in actors:
+            actor.join(timeout=5)
+            if actor.is_alive():
+                actor.terminate()
+
+    elapsed = time.time() - start_time
+    recent = episode_rewards[-100:] or [0.0]
+    return agent, {
+        'episode_rewards': episode_rewards,
+        'evaluation_scores': [],
+        'mean_reward': float(np.mean(recent)),
+        'std_reward': float(np.std(recent)),
+        'env_steps': env_steps,
+        'updates': updates,
+        'env_steps_per_second': env_steps / elapsed,
+    }
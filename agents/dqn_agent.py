@@ -2,8 +2,71 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
-from collections import deque
 import random
+import warnings
+
+from agents.profiling import NULL_TIMER
+from agents.replay_buffer import (ReplayBuffer, PrioritizedReplayBuffer, CompactReplayBuffer,
+                                  PrioritizedCompactReplayBuffer)
+
+# Order in which observation components are flattened into the state vector
+STATE_KEYS = [
+    'grid_size',
+    'player_pos',
+    'wumpus_positions',
+    'pit_positions',
+    'gold_position',
+    'has_gold',
+    'percepts',
+    'visited_cells',
+]
+
+class ObservationEncoder:
+    """Flattens dict observations into preallocated state vectors.
+
+    The layout (STATE_KEYS order and the size of each key) is read once
+    from an observation space, or from anything whose values have the
+    per-observation shapes (e.g. a single observation). encode() and
+    encode_batch() write straight into `out` with one np.concatenate,
+    casting to `dtype` on the way; without `out` they allocate a fresh
+    array. Use a signed dtype for compact encodings, as missing positions
+    are -1.
+
+    When the space has bounds (Box spaces), `binary_columns` marks the
+    state columns that only hold 0/1 and `int8_columns` whether every
+    other column fits in an int8, which CompactReplayBuffer relies on.
+    """
+
+    def __init__(self, observation_space, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        self.sizes = [int(np.prod(observation_space[key].shape)) for key in STATE_KEYS]
+        self.flat = [len(observation_space[key].shape) == 1 for key in STATE_KEYS]
+        self.state_dim = sum(self.sizes)
+
+        low = np.concatenate([np.broadcast_to(getattr(observation_space[key], 'low', -np.inf),
+                                              (size,)) for key, size in zip(STATE_KEYS, self.sizes)])
+        high = np.concatenate([np.broadcast_to(getattr(observation_space[key], 'high', np.inf),
+                                               (size,)) for key, size in zip(STATE_KEYS, self.sizes)])
+        self.binary_columns = (low >= 0) & (high <= 1)
+        self.int8_columns = bool(np.all(low >= -128) and np.all(high <= 127))
+
+    def encode(self, obs, out=None):
+        """(state_dim,) state vector of one observation"""
+        if out is None:
+            out = np.empty(self.state_dim, dtype=self.dtype)
+        parts = [obs[key] if flat else obs[key].reshape(-1)
+                 for key, flat in zip(STATE_KEYS, self.flat)]
+        return np.concatenate(parts, out=out, casting='unsafe')
+
+    def encode_batch(self, obs, out=None):
+        """(N, state_dim) states of a batched dict observation"""
+        n = len(obs['player_pos'])
+        if out is None:
+            out = np.empty((n, self.state_dim), dtype=self.dtype)
+        parts = [obs[key] if flat else obs[key].reshape(n, -1)
+                 for key, flat in zip(STATE_KEYS, self.flat)]
+        return np.concatenate(parts, axis=1, out=out, casting='unsafe')
+
 
 class DQNNetwork(nn.Module):
     def __init__(self, input_dim, output_dim):
@@ -20,12 +83,79 @@ class DQNNetwork(nn.Module):
     def forward(self, x):
         return self.network(x)
 
+
+NETWORK_BACKENDS = ['eager', 'script', 'compile']
+
+
+def optimize_network(net, backend='eager'):
+    """Callable running `net` through TorchScript ('script') or torch.compile ('compile').
+
+    The returned module shares its parameters with `net`, so optimizer
+    steps, load_state_dict() and saving keep going through `net`. For an
+    MLP this small the cost is Python dispatch rather than FLOPs, which
+    scripting removes; torch.compile pays off only for bigger batches or
+    networks (its guards cost more than the whole forward on a CPU).
+    """
+    if backend == 'eager':
+        return net
+    if backend == 'script':
+        with warnings.catch_warnings():
+            # Scripting is deprecated in newer torch releases but still the fastest here
+            warnings.simplefilter('ignore', FutureWarning)
+            return torch.jit.script(net)
+    if backend == 'compile':
+        return torch.compile(net, dynamic=True)
+    raise ValueError(f"Unknown network backend: {backend}")
+
+
+def make_optimizer(params, learning_rate, fused=False):
+    """Adam, as a single fused kernel when asked for and supported (CPU needs torch >= 2.4)"""
+    params = list(params)
+    if fused:
+        try:
+            return optim.Adam(params, lr=learning_rate, fused=True)
+        except RuntimeError:
+            pass
+    return optim.Adam(params, lr=learning_rate)
+
+
+def configure_threads(num_threads=None, interop_threads=None):
+    """Set torch's intra-op (and inter-op) thread counts; returns the counts in effect.
+
+    Run one thread per process when several training processes share the
+    machine, otherwise they oversubscribe the cores. The inter-op pool can
+    only be sized before torch first uses it, so later calls keep the
+    current size with a warning.
+    """
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if interop_threads and interop_threads != torch.get_num_interop_threads():
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            print(f"Inter-op threads already started, keeping {torch.get_num_interop_threads()}")
+    return torch.get_num_threads(), torch.get_num_interop_threads()
+
+
 class DQNAgent:
     def __init__(self, state_dim, action_dim, learning_rate=0.001, gamma=0.99,
                  epsilon_start=1.0, epsilon_end=0.01, epsilon_decay=0.995,
-                 memory_size=10000, batch_size=64):
-        self.state_dim = state_dim
-        self.action_dim = action_dim
+                 memory_size=10000, batch_size=64, share_memory=False, pin_memory=False,
+                 prioritized_replay=False, priority_alpha=0.6, priority_beta=0.4,
+                 observation_space=None, compact_replay=False, network_backend='eager',
+                 fused_optimizer=False):
+        # Observation encoder (built from the first observation if no space is given)
+        self.encoder = None
+        if observation_space is not None:
+            self.encoder = ObservationEncoder(observation_space)
+            if state_dim is None:
+                state_dim = self.encoder.state_dim
+            elif state_dim != self.encoder.state_dim:
+                raise ValueError(f"state_dim {state_dim} does not match the observation space "
+                                 f"({self.encoder.state_dim})")
+        # Plain ints (spaces report numpy ones), which TorchScript needs for the layer sizes
+        self.state_dim = state_dim = int(state_dim)
+        self.action_dim = action_dim = int(action_dim)
         self.gamma = gamma
         self.epsilon = epsilon_start
         self.epsilon_end = epsilon_end
@@ -37,8 +167,40 @@ class DQNAgent:
         self.target_net = DQNNetwork(state_dim, action_dim)
         self.target_net.load_state_dict(self.policy_net.state_dict())
         
-        self.optimizer = optim.Adam(self.policy_net.parameters(), lr=learning_rate)
-        self.memory = deque(maxlen=memory_size)
+        # Forward passes go through the (optionally scripted/compiled) wrappers;
+        # policy_net/target_net stay plain modules for saving and weight syncs
+        self.network_backend = network_backend
+        self.policy_forward = optimize_network(self.policy_net, network_backend)
+        self.target_forward = optimize_network(self.target_net, network_backend)
+        # inference_mode() tensors break a scripted network once replay() has run it
+        # with autograd ("Inference tensors cannot be saved for backward"), so the
+        # scripted forwards in act()/act_batch() run under no_grad() instead
+        self.inference_context = torch.no_grad if network_backend == 'script' else torch.inference_mode
+        
+        # Fused Adam is a separate choice: it changes the update numerics slightly
+        self.optimizer = make_optimizer(self.policy_net.parameters(), learning_rate,
+                                        fused=fused_optimizer)
+        self.prioritized_replay = prioritized_replay
+        memory_kwargs = {'share_memory': share_memory, 'pin_memory': pin_memory}
+        if compact_replay:
+            # int8 / bit-packed states, expanded to float32 when a batch is sampled
+            if self.encoder is None or not self.encoder.int8_columns:
+                raise ValueError("compact_replay needs an observation_space with int8-sized bounds")
+            memory_kwargs['bit_columns'] = self.encoder.binary_columns
+        if prioritized_replay:
+            buffer = PrioritizedCompactReplayBuffer if compact_replay else PrioritizedReplayBuffer
+            self.memory = buffer(memory_size, state_dim, alpha=priority_alpha, beta=priority_beta,
+                                 **memory_kwargs)
+        else:
+            buffer = CompactReplayBuffer if compact_replay else ReplayBuffer
+            self.memory = buffer(memory_size, state_dim, **memory_kwargs)
+        
+        # Reusable input buffer and RNG for batched action selection
+        self._act_buffer = torch.empty((0, state_dim), dtype=torch.float32)
+        self.rng = np.random.default_rng()
+        
+        # Phase timer (agents.profiling.PhaseTimer) for replay sampling and updates
+        self.timer = NULL_TIMER
         
         # Training metrics
         self.losses = []
@@ -46,79 +208,112 @@ class DQNAgent:
         self.episode_lengths = []
         
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.add(state, action, reward, next_state, done)
     
     def act(self, state, training=True):
         if training and random.random() < self.epsilon:
             return random.randrange(self.action_dim)
         
-        with torch.no_grad():
-            state_tensor = torch.FloatTensor(state).unsqueeze(0)
-            q_values = self.policy_net(state_tensor)
+        with self.inference_context():
+            state_tensor = torch.from_numpy(np.asarray(state, dtype=np.float32)).unsqueeze(0)
+            q_values = self.policy_forward(state_tensor)
             return q_values.argmax().item()
     
+    def act_batch(self, states, training=True):
+        """Epsilon-greedy actions for a (K, state_dim) batch of states.
+
+        Runs a single forward pass for all rows and draws the exploration
+        coin flips and random actions vectorized. Returns an int64 array.
+        """
+        states = np.asarray(states, dtype=np.float32)
+        k = len(states)
+        if self._act_buffer.shape[0] < k:
+            self._act_buffer = torch.empty((k, self.state_dim), dtype=torch.float32)
+        batch = self._act_buffer[:k]
+        batch.copy_(torch.from_numpy(states))
+        
+        with self.inference_context():
+            actions = self.policy_forward(batch).argmax(dim=1).numpy()
+        
+        if training:
+            explore = self.rng.random(k) < self.epsilon
+            actions = np.where(explore, self.rng.integers(0, self.action_dim, size=k), actions)
+        return actions
+    
     def replay(self):
         if len(self.memory) < self.batch_size:
             return
         
         try:
-            batch = random.sample(self.memory, self.batch_size)
-            states, actions, rewards, next_states, dones = zip(*batch)
-            
-            states = torch.FloatTensor(np.array(states))
-            actions = torch.LongTensor(actions)
-            rewards = torch.FloatTensor(rewards)
-            next_states = torch.FloatTensor(np.array(next_states))
-            dones = torch.FloatTensor(dones)
+            if self.prioritized_replay:
+                with self.timer.phase('replay.sample'):
+                    (states, actions, rewards, next_states, dones,
+                     weights, indices) = self.memory.sample_with_weights(self.batch_size)
+                td_errors = self.learn(states, actions, rewards, next_states, dones, weights)
+                with self.timer.phase('replay.priorities'):
+                    self.memory.update_priorities(indices, td_errors)
+            else:
+                with self.timer.phase('replay.sample'):
+                    batch = self.memory.sample(self.batch_size)
+                self.learn(*batch)
             
+        except Exception as e:
+            print(f"Error in replay: {str(e)}")
+            return
+    
+    def learn(self, states, actions, rewards, next_states, dones, weights=None):
+        """One gradient step on a batch of transition tensors; returns the TD errors"""
+        with self.timer.phase('replay.forward'):
             # Get current Q values
-            current_q_values = self.policy_net(states)
+            current_q_values = self.policy_forward(states)
             current_q_values = current_q_values.gather(1, actions.unsqueeze(1))
             
             # Get next Q values
             with torch.no_grad():
-                next_q_values = self.target_net(next_states).max(1)[0].detach()
+                next_q_values = self.target_forward(next_states).max(1)[0].detach()
             
             # Compute target Q values
             target_q_values = rewards + (1 - dones) * self.gamma * next_q_values
             
-            # Compute loss
-            loss = nn.MSELoss()(current_q_values.squeeze(), target_q_values)
-            
-            # Optimize the model
+            # Compute loss, weighted by importance sampling under prioritized replay
+            td_errors = target_q_values - current_q_values.squeeze(1)
+            if weights is not None:
+                loss = (weights * td_errors.pow(2)).mean()
+            else:
+                loss = td_errors.pow(2).mean()
+        
+        # Optimize the model
+        with self.timer.phase('replay.backward'):
             self.optimizer.zero_grad()
             loss.backward()
-            
+        
+        with self.timer.phase('replay.optimizer'):
             # Gradient clipping to prevent exploding gradients
             torch.nn.utils.clip_grad_norm_(self.policy_net.parameters(), max_norm=1.0)
             
             self.optimizer.step()
-            
-            self.losses.append(loss.item())
-            
-            # Decay epsilon
-            self.epsilon = max(self.epsilon_end, self.epsilon * self.epsilon_decay)
-            
-        except Exception as e:
-            print(f"Error in replay: {str(e)}")
-            return
+        
+        self.losses.append(loss.item())
+        return td_errors.detach().numpy()
+    
+    def decay_epsilon(self):
+        """Decay epsilon once; called per episode by the training loop"""
+        self.epsilon = max(self.epsilon_end, self.epsilon * self.epsilon_decay)
     
     def update_target_network(self):
         self.target_net.load_state_dict(self.policy_net.state_dict())
     
-    def preprocess_state(self, state_dict):
-        """Convert dictionary observation to flat array"""
-        # Convert each component to float32 and flatten
-        state_components = [
-            state_dict['grid_size'].flatten(),
-            state_dict['player_pos'].flatten(),
-            state_dict['wumpus_positions'].flatten(),
-            state_dict['pit_positions'].flatten(),
-            state_dict['gold_position'].flatten(),
-            state_dict['has_gold'].flatten(),
-            state_dict['visited_cells'].flatten()
-        ]
-        return np.concatenate(state_components).astype(np.float32)
+    def preprocess_state(self, state_dict, out=None):
+        """Convert dictionary observation to a flat float32 array (written into `out` if given)"""
+        if self.encoder is None:
+            self.encoder = ObservationEncoder(state_dict)
+        return self.encoder.encode(state_dict, out)
+    
+    def preprocess_batch(self, obs_dict, out=None):
+        """Convert a batched dictionary observation to a (N, state_dim) array"""
+        if self.encoder is None:
+            self.encoder = ObservationEncoder({key: value[0] for key, value in obs_dict.items()})
+        return self.encoder.encode_batch(obs_dict, out)
     
     def save(self, path):
         """Save the model"""
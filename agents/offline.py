@@ -0,0 +1,222 @@
+import argparse
+import queue
+import threading
+import time
+
+import numpy as np
+import torch
+
+from agents.dqn_agent import DQNAgent, STATE_KEYS
+from env.trajectory import TrajectoryReader, observations
+from env.wumpus_env import WumpusEnv
+from evaluate import evaluate_policy_batched, print_summary
+
+COLUMNS = (['action', 'reward', 'done'] + [f'obs_{key}' for key in STATE_KEYS]
+           + [f'next_obs_{key}' for key in STATE_KEYS])
+
+
+def batch_transitions(batch, agent):
+    """(states, actions, rewards, next_states, dones) arrays of a batch of trajectory columns.
+
+    Arrow shots from the human game (actions the agent does not have) are
+    dropped. Only true terminations count as done, so transitions cut off
+    by the step limit still bootstrap.
+    """
+    keep = batch['action'] < agent.action_dim
+    if not keep.all():
+        batch = {name: column[keep] for name, column in batch.items()}
+    states = agent.preprocess_batch(observations(batch, 'obs_'))
+    if states.shape[1] != agent.state_dim:
+        raise ValueError(f"Trajectories hold {states.shape[1]}-dim states, the agent expects "
+                         f"{agent.state_dim} (recorded with another max grid size?)")
+    return (states, batch['action'].astype(np.int64), batch['reward'],
+            agent.preprocess_batch(observations(batch, 'next_obs_')),
+            batch['done'].astype(np.float32))
+
+
+class ShardLoader:
+    """Minibatches from trajectory shards, prepared on background threads.
+
+    Each pass shuffles the shard list of a TrajectoryReader and gives
+    every one of the `workers` threads every workers-th shard. A worker
+    reads its shards with TrajectoryReader.iter_batches (np.load releases
+    the GIL while inflating; rows are shuffled per shard and carried over
+    between shards), flattens the observations and queues torch tensors,
+    at most `prefetch` batches ahead. Iterating yields (states, actions,
+    rewards, next_states, dones) tensors, so the training loop only runs
+    gradient steps. Rows left over at the end of a worker's shards form
+    one smaller batch, and batches holding arrow shots lose those rows.
+    """
+
+    def __init__(self, directories, agent, batch_size=64, workers=2, prefetch=64, seed=None):
+        self.reader = TrajectoryReader(directories)
+        self.paths = self.reader.shards
+        if not self.paths:
+            raise ValueError(f"No trajectory shards in {', '.join(self.reader.directories)}")
+        self.agent = agent
+        self.batch_size = batch_size
+        self.workers = min(workers, len(self.paths))
+        self.prefetch = prefetch
+        self.rng = np.random.default_rng(seed)
+
+    def __iter__(self):
+        order = self.rng.permutation(len(self.paths))
+        batches = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        seeds = self.rng.integers(0, 2 ** 32, size=self.workers)
+        threads = [
+            threading.Thread(target=self._produce, daemon=True,
+                             args=([self.paths[i] for i in order[w::self.workers]], batches, stop,
+                                   np.random.default_rng(seeds[w])))
+            for w in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            finished = 0
+            while finished < len(threads):
+                item = batches.get()
+                if item is None:
+                    finished += 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _produce(self, paths, batches, stop, rng):
+        def put(item):
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        try:
+            for batch in self.reader.iter_batches(self.batch_size, COLUMNS, rng, paths=paths):
+                arrays = batch_transitions(batch, self.agent)
+                if len(arrays[1]) and not put(tuple(torch.from_numpy(a) for a in arrays)):
+                    return
+        except Exception as e:
+            put(e)
+        put(None)
+
+
+def load_into_memory(agent, directories, workers=2, seed=None):
+    """Stream every shard into the agent's replay memory; returns the transitions added.
+
+    Shards beyond the memory capacity overwrite the oldest rows, as online
+    transitions would.
+    """
+    loader = ShardLoader(directories, agent, batch_size=65536, workers=workers, prefetch=4,
+                         seed=seed)
+    added = 0
+    for states, actions, rewards, next_states, dones in loader:
+        agent.memory.add_batch(states.numpy(), actions.numpy(), rewards.numpy(),
+                               next_states.numpy(), dones.numpy())
+        added += len(actions)
+    return added
+
+
+def train_offline(agent, directories, epochs=1, mode='stream', target_update_interval=500,
+                  workers=2, prefetch=64, seed=None, log_every=1000):
+    """Train a DQNAgent from recorded trajectories without touching an env.
+
+    mode='stream' runs one learn() step per minibatch from a ShardLoader,
+    so the data set never has to fit in memory. mode='buffer' streams the
+    shards into the replay memory once and then runs replay() (with the
+    agent's uniform or prioritized sampling) for epochs * len(memory) /
+    batch_size steps. The
+    target network is synced every `target_update_interval` updates.
+    Returns a dict of training statistics.
+    """
+    start = time.perf_counter()
+    updates = 0
+    transitions = 0
+
+    def after_update():
+        if updates % target_update_interval == 0:
+            agent.update_target_network()
+        if log_every and updates % log_every == 0:
+            elapsed = time.perf_counter() - start
+            print(f"{updates} updates, loss {np.mean(agent.losses[-log_every:]):.3f}, "
+                  f"{updates / elapsed:.0f} updates/s")
+
+    if mode == 'stream':
+        loader = ShardLoader(directories, agent, agent.batch_size, workers, prefetch, seed)
+        for epoch in range(epochs):
+            for batch in loader:
+                agent.learn(*batch)
+                updates += 1
+                transitions += len(batch[1])
+                after_update()
+    elif mode == 'buffer':
+        transitions = load_into_memory(agent, directories, workers, seed)
+        print(f"Loaded {transitions} transitions into replay memory")
+        steps = epochs * len(agent.memory) // agent.batch_size
+        for _ in range(steps):
+            agent.replay()
+            updates += 1
+            after_update()
+        transitions = steps * agent.batch_size
+    else:
+        raise ValueError(f"Unknown offline training mode: {mode}")
+    agent.update_target_network()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'updates': updates,
+        'transitions': transitions,
+        'seconds': elapsed,
+        'updates_per_second': updates / elapsed if elapsed else 0.0,
+        'mean_loss': float(np.mean(agent.losses[-updates:])) if updates else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the custom DQN offline from recorded trajectories")
+    parser.add_argument('directories', nargs='+',
+                        help="trajectory directories (train.py --record-dir, main.py --record, "
+                             "agents.oracle --record)")
+    parser.add_argument('--mode', choices=['stream', 'buffer'], default='stream')
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--memory-size', type=int, default=1000000,
+                        help="replay memory size for --mode buffer")
+    parser.add_argument('--prioritized', action='store_true',
+                        help="prioritized (sum-tree) replay memory for --mode buffer")
+    parser.add_argument('--compact', action='store_true',
+                        help="int8/bit-packed replay memory for --mode buffer")
+    parser.add_argument('--workers', type=int, default=2, help="shard loading threads")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='models/offline_dqn.pth')
+    parser.add_argument('--eval-episodes', type=int, default=1000)
+    parser.add_argument('--grid-size', type=int, default=4)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    env = WumpusEnv()
+    memory = {'memory_size': args.memory_size, 'prioritized_replay': args.prioritized,
+              'compact_replay': args.compact} if args.mode == 'buffer' else {}
+    agent = DQNAgent(state_dim=None, action_dim=env.action_space.n, batch_size=args.batch_size,
+                     observation_space=env.observation_space, **memory)
+    stats = train_offline(agent, args.directories, args.epochs, args.mode, workers=args.workers,
+                          seed=args.seed)
+    print(f"{stats['updates']} updates on {stats['transitions']} transitions in "
+          f"{stats['seconds']:.1f}s ({stats['updates_per_second']:.0f} updates/s)")
+    agent.save(args.output)
+    print(f"Model saved to {args.output}")
+
+    if args.eval_episodes:
+        results = evaluate_policy_batched(agent, args.eval_episodes, grid_size=args.grid_size,
+                                          seed=args.seed)
+        print_summary(f"Offline DQN on {args.grid_size}x{args.grid_size}", results)
+
+
+if __name__ == "__main__":
+    main()
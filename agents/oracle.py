@@ -0,0 +1,358 @@
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+
+from env import bitboard
+from env.trajectory import TrajectoryWriter
+from env.world_suite import WorldSuite
+from env.wumpus_env import WumpusEnv
+from env.wumpus_world import WumpusWorld, ACTIONS, PLAYING, LOST
+
+OUTCOMES = ['won', 'lost', 'timeout']
+
+
+def neighbours(cell, size):
+    x, y = cell
+    return [(x + dx, y + dy) for dx, dy in ACTIONS
+            if 0 <= x + dx < size and 0 <= y + dy < size]
+
+
+def action_towards(cell, target):
+    return ACTIONS.index((target[0] - cell[0], target[1] - cell[1]))
+
+
+def shortest_path(size, start, targets, passable):
+    """BFS from start to the nearest cell in `targets`.
+
+    Only cells for which passable(cell) is true are expanded; a target may
+    itself be impassable (it is entered but not walked through). Returns the
+    list of cells from start to the target, or None if none is reachable.
+    """
+    start = tuple(start)
+    parents = {start: None}
+    frontier = deque([start])
+    while frontier:
+        cell = frontier.popleft()
+        if cell in targets:
+            path = []
+            while cell is not None:
+                path.append(cell)
+                cell = parents[cell]
+            return path[::-1]
+        if cell != start and not passable(cell):
+            continue
+        for nxt in neighbours(cell, size):
+            if nxt not in parents:
+                parents[nxt] = cell
+                frontier.append(nxt)
+    return None
+
+
+def wall_action(world):
+    """An action that bumps into a wall, i.e. waits without moving"""
+    x, y = world.player_pos
+    for i, (dx, dy) in enumerate(ACTIONS):
+        if not (0 <= x + dx < world.grid_size and 0 <= y + dy < world.grid_size):
+            return i
+    return None
+
+
+class OracleAgent:
+    """Full-information planner: shortest safe path to the gold and back.
+
+    Sees the whole world, walks the shortest pit- and wumpus-free path to
+    the gold and retraces it to the start. On worlds where the gold cannot
+    be reached safely it waits at the start until the episode times out.
+    """
+
+    def reset(self, world):
+        size = world.grid_size
+        blocked = world.pit_bits
+        if world.wumpus_pos is not None:
+            blocked |= bitboard.cell_bit(*world.wumpus_pos, size)
+        path = shortest_path(size, world.start_pos, {tuple(world.gold_pos)},
+                             lambda cell: not bitboard.contains(blocked, *cell, size))
+        self.solvable = path is not None
+        self.plan = deque()
+        if path is not None:
+            route = path + path[-2::-1]
+            self.plan.extend(action_towards(a, b) for a, b in zip(route, route[1:]))
+
+    def act(self, world):
+        if self.plan:
+            return self.plan.popleft()
+        return wall_action(world)
+
+
+class InferenceAgent:
+    """Percept-only agent that reasons about pits and the wumpus.
+
+    Only uses the breeze and stench felt on visited cells and the game
+    rules (pit count, wumpus never on the bottom row). Cells next to a
+    breeze-free cell are pit-free and cells next to a stench-free cell are
+    wumpus-free; a breezy cell with a single unresolved neighbour pins down
+    a pit and the stench cells narrow down the wumpus candidates. The agent
+    walks to the nearest cell proven safe; when there is none it takes the
+    frontier cell with the lowest estimated risk, as long as that risk is
+    below `risk_threshold` (a win is worth about 3000 and a death costs
+    1000, so gambles below 0.75 pay off), otherwise it goes home and waits. Once it holds
+    the gold it walks back to the start over visited cells.
+    """
+
+    def __init__(self, risk_threshold=0.75):
+        self.risk_threshold = risk_threshold
+
+    def reset(self, world):
+        self.size = world.grid_size
+        self.num_pits = world.num_pits
+        self.visited = set()
+        self.no_pit = set()
+        self.no_wumpus = {(self.size - 1, y) for y in range(self.size)}
+        self.breezy = set()
+        self.stenchy = set()
+        self.gave_up = False
+
+    def observe(self, world):
+        cell = tuple(world.player_pos)
+        if cell in self.visited:
+            return
+        self.visited.add(cell)
+        self.no_pit.add(cell)
+        self.no_wumpus.add(cell)
+        around = neighbours(cell, self.size)
+        if world.breeze_grid[cell]:
+            self.breezy.add(cell)
+        else:
+            self.no_pit.update(around)
+        if world.stench_grid[cell]:
+            self.stenchy.add(cell)
+        else:
+            self.no_wumpus.update(around)
+
+    def wumpus_candidates(self):
+        candidates = {(x, y) for x in range(self.size) for y in range(self.size)} - self.no_wumpus
+        for cell in self.stenchy:
+            candidates &= set(neighbours(cell, self.size))
+        return candidates
+
+    def pit_risk(self, cell):
+        if cell in self.no_pit:
+            return 0.0
+        risks = []
+        for other in neighbours(cell, self.size):
+            if other in self.breezy:
+                unresolved = [c for c in neighbours(other, self.size) if c not in self.no_pit]
+                risks.append(1.0 / len(unresolved))
+        if risks:
+            return max(risks)
+        unknown = self.size * self.size - len(self.no_pit)
+        return min(1.0, self.num_pits / max(1, unknown))
+
+    def risk(self, cell, candidates):
+        wumpus = 1.0 / len(candidates) if cell in candidates else 0.0
+        return 1.0 - (1.0 - self.pit_risk(cell)) * (1.0 - wumpus)
+
+    def act(self, world):
+        self.observe(world)
+        size = self.size
+        walkable = self.visited.__contains__
+        if world.has_gold or self.gave_up:
+            path = shortest_path(size, world.player_pos, {tuple(world.start_pos)}, walkable)
+            if path is None or len(path) == 1:
+                return wall_action(world)
+            return action_towards(path[0], path[1])
+
+        candidates = self.wumpus_candidates()
+        frontier = {nxt for cell in self.visited for nxt in neighbours(cell, size)} - self.visited
+        safe = {cell for cell in frontier if cell in self.no_pit and cell not in candidates}
+        targets = safe
+        if not targets:
+            risks = {cell: self.risk(cell, candidates) for cell in frontier}
+            lowest = min(risks.values(), default=1.0)
+            if lowest >= self.risk_threshold:
+                self.gave_up = True
+                return self.act(world)
+            targets = {cell for cell, risk in risks.items() if risk == lowest}
+        path = shortest_path(size, world.player_pos, targets, walkable)
+        return action_towards(path[0], path[1])
+
+
+SOLVERS = {
+    'oracle': OracleAgent,
+    'inference': InferenceAgent,
+}
+
+
+def play(agent, world, max_steps=200, death_penalty=-1000):
+    """Play one episode of a WumpusWorld with an oracle/inference agent"""
+    agent.reset(world)
+    reward = 0
+    while world.state == PLAYING and world.steps < max_steps:
+        score, _ = world.step(agent.act(world))
+        reward += score
+    if world.state == LOST:
+        reward += death_penalty
+    outcome = world.state if world.state != PLAYING else 'timeout'
+    return reward, world.steps, outcome
+
+
+def _solve_chunk(suite, solver, indices, max_steps, death_penalty):
+    agent = SOLVERS[solver]()
+    rewards = np.zeros(len(indices), dtype=np.float32)
+    steps = np.zeros(len(indices), dtype=np.int16)
+    outcomes = np.zeros(len(indices), dtype=np.int8)
+    for k, index in enumerate(indices):
+        layout = suite.layout(index)
+        world = WumpusWorld(layout['grid_size'], len(layout['pits']), layout=layout)
+        rewards[k], steps[k], outcome = play(agent, world, max_steps, death_penalty)
+        outcomes[k] = OUTCOMES.index(outcome)
+    return rewards, steps, outcomes
+
+
+def results_path(suite, solver):
+    return os.path.join(suite.path, f'{solver}_results.npz')
+
+
+def solve_suite(suite, solver='oracle', workers=None, max_steps=200, death_penalty=-1000,
+                cache=True):
+    """Play every world of a suite with a solver, in parallel, with caching.
+
+    Worlds are split into chunks over a process pool (workers reopen the
+    suite's memory-mapped files). Results are saved next to the suite as
+    <solver>_results.npz and reused by later calls. Returns a dict of
+    per-world arrays: 'reward', 'steps' and 'outcome' (index into OUTCOMES).
+    """
+    path = results_path(suite, solver)
+    if cache and os.path.exists(path):
+        with np.load(path) as cached:
+            if len(cached['reward']) == len(suite):
+                return {key: cached[key] for key in cached.files}
+
+    workers = workers or os.cpu_count()
+    chunks = np.array_split(np.arange(len(suite)), workers * 4)
+    if workers == 1:
+        parts = [_solve_chunk(suite, solver, chunk, max_steps, death_penalty) for chunk in chunks]
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            parts = list(pool.map(_solve_chunk, [suite] * len(chunks), [solver] * len(chunks),
+                                  chunks, [max_steps] * len(chunks),
+                                  [death_penalty] * len(chunks)))
+
+    results = {
+        'reward': np.concatenate([part[0] for part in parts]),
+        'steps': np.concatenate([part[1] for part in parts]),
+        'outcome': np.concatenate([part[2] for part in parts]),
+    }
+    if cache:
+        np.savez(path, **results)
+    return results
+
+
+def load_results(suite, solver='oracle'):
+    """Cached solve_suite results for a suite, or None"""
+    path = results_path(suite, solver)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as cached:
+        return {key: cached[key] for key in cached.files}
+
+
+def demo_env_like(env):
+    """Non-adaptive copy of `env` (same grid size, limits and suite) for solver episodes"""
+    return WumpusEnv(min_grid_size=env.min_grid_size, max_grid_size=env.max_grid_size,
+                     grid_size=env.grid_size, max_steps=env.max_steps,
+                     death_penalty=env.death_penalty, adaptive=False, suite=env.suite)
+
+
+def solver_episodes(env, n_episodes, solver='oracle', seed=0):
+    """Play episodes of `env` with a solver.
+
+    Yields (transitions, outcome) per episode, where transitions is a list
+    of (obs, action, reward, next_obs, terminated, truncated) tuples.
+    """
+    solver_agent = SOLVERS[solver]()
+    obs, _ = env.reset(seed=seed)
+    for _ in range(n_episodes):
+        solver_agent.reset(env.world)
+        transitions = []
+        terminated = truncated = False
+        while not (terminated or truncated):
+            action = solver_agent.act(env.world)
+            next_obs, reward, terminated, truncated, info = env.step(action)
+            transitions.append((obs, action, reward, next_obs, terminated, truncated))
+            obs = next_obs
+        yield transitions, info['outcome']
+        obs, _ = env.reset()
+
+
+def prefill_memory(agent, env, n_episodes, solver='oracle', seed=0, only_wins=True):
+    """Fill a DQNAgent's replay memory with solver demonstrations.
+
+    Plays `n_episodes` on a non-adaptive copy of `env` so the training env's
+    difficulty is left alone, and stores the transitions of every episode
+    (only the won ones with only_wins=True). Returns the number of
+    transitions added.
+    """
+    added = 0
+    for transitions, outcome in solver_episodes(demo_env_like(env), n_episodes, solver, seed):
+        if outcome == 'won' or not only_wins:
+            obs, actions, rewards, next_obs, dones, _ = zip(*transitions)
+            states = np.empty((2, len(actions), agent.state_dim), dtype=np.float32)
+            for i, (o, next_o) in enumerate(zip(obs, next_obs)):
+                agent.preprocess_state(o, out=states[0, i])
+                agent.preprocess_state(next_o, out=states[1, i])
+            agent.memory.add_batch(states[0], np.array(actions), np.array(rewards), states[1],
+                                   np.array(dones))
+            added += len(actions)
+    return added
+
+
+def record_demonstrations(recorder, env, n_episodes, solver='oracle', seed=0, only_wins=False):
+    """Append solver episodes on a copy of `env` to a TrajectoryWriter; returns the rows written"""
+    demo_env = demo_env_like(env)
+    written = 0
+    for transitions, outcome in solver_episodes(demo_env, n_episodes, solver, seed):
+        if outcome == 'won' or not only_wins:
+            for transition in transitions:
+                recorder.add(*transition, world=demo_env.world_index)
+            written += len(transitions)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a world suite with the oracle or inference agent")
+    parser.add_argument('suite', help="world suite directory (see env/world_suite.py)")
+    parser.add_argument('--solver', choices=list(SOLVERS), default='oracle')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-cache', action='store_true', help="re-solve even if results are cached")
+    parser.add_argument('--record', default=None,
+                        help="also record solver demonstrations as trajectory shards here")
+    parser.add_argument('--record-episodes', type=int, default=1000,
+                        help="demonstration episodes to record per grid size")
+    args = parser.parse_args()
+
+    suite = WorldSuite(args.suite)
+    if args.record:
+        with TrajectoryWriter(args.record) as recorder:
+            for size in suite.grid_sizes:
+                env = WumpusEnv(grid_size=size, adaptive=False, suite=suite)
+                record_demonstrations(recorder, env, args.record_episodes, args.solver)
+        print(f"Recorded {recorder.total_rows} {args.solver} transitions to {args.record}")
+    results = solve_suite(suite, args.solver, args.workers, cache=not args.no_cache)
+    for size in suite.grid_sizes:
+        offset, count = suite.index_range(size)
+        rows = slice(offset, offset + count)
+        outcomes = results['outcome'][rows]
+        print(f"{size}x{size}: mean reward {results['reward'][rows].mean():.1f}, "
+              f"win rate {(outcomes == 0).mean():.1%}, death rate {(outcomes == 1).mean():.1%}, "
+              f"mean steps {results['steps'][rows].mean():.1f}")
+    print(f"Results saved to {results_path(suite, args.solver)}")
+
+
+if __name__ == "__main__":
+    main()
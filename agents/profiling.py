@@ -0,0 +1,174 @@
+import cProfile
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class NullTimer:
+    """Stand-in for PhaseTimer when timing is off: every call is a no-op"""
+
+    _context = nullcontext()
+
+    def phase(self, name):
+        return self._context
+
+
+NULL_TIMER = NullTimer()
+
+
+class Phase:
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timer.seconds[self.name] += time.perf_counter() - self.start
+        self.timer.calls[self.name] += 1
+
+
+class PhaseTimer:
+    """Wall time and call counts per named phase.
+
+    Use `with timer.phase('env_step'): ...` around hot-path sections; the
+    context objects are created once per name, so a timed phase costs two
+    perf_counter() calls. snapshot() returns and clears the totals.
+    Phases of the same name must not nest.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def phase(self, name):
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(self, name)
+        return phase
+
+    def snapshot(self):
+        snapshot = {name: {'seconds': self.seconds[name], 'calls': self.calls[name]}
+                    for name in self.seconds}
+        self.seconds.clear()
+        self.calls.clear()
+        return snapshot
+
+
+def max_rss_mb():
+    """Peak resident memory of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class TrainingTimings:
+    """Per-episode timing records for the custom DQN training loop.
+
+    Owns a PhaseTimer that the loop and the agent share. end_episode()
+    turns the phase totals of the finished episode into one record (steps
+    and updates per second, replay sample latency, replay memory size,
+    peak RSS), appends it as a JSON line to `path` if given and adds it to
+    the run totals printed by summary().
+    """
+
+    def __init__(self, path=None):
+        self.timer = PhaseTimer()
+        self.path = path
+        self.file = None
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.file = open(path, 'a')
+        self.totals = defaultdict(float)
+        self.total_seconds = 0.0
+        self.episode_start = time.perf_counter()
+
+    def end_episode(self, episode, steps, reward, agent=None, **extra):
+        now = time.perf_counter()
+        seconds = now - self.episode_start
+        self.episode_start = now
+        phases = self.timer.snapshot()
+        updates = phases.get('replay.optimizer', {}).get('calls', 0)
+        sample = phases.get('replay.sample')
+        record = {
+            'episode': episode,
+            'steps': steps,
+            'reward': reward,
+            'seconds': seconds,
+            'steps_per_sec': steps / seconds if seconds else None,
+            'updates': updates,
+            'updates_per_sec': updates / seconds if seconds else None,
+            'replay_sample_us': sample['seconds'] / sample['calls'] * 1e6 if sample else None,
+            **extra,
+            'phases': phases,
+        }
+        if agent is not None:
+            record['replay_size'] = len(agent.memory)
+            record['replay_memory_mb'] = agent.memory.nbytes / 2 ** 20
+        record['max_rss_mb'] = max_rss_mb()
+
+        self.total_seconds += seconds
+        for name, phase in phases.items():
+            self.totals[name] += phase['seconds']
+        if self.file is not None:
+            self.file.write(json.dumps(record) + '\n')
+            self.file.flush()
+        return record
+
+    def summary(self):
+        """Print the share of wall time spent in every phase so far.
+
+        replay.* phases are parts of the replay phase, so they are not
+        added on top of it.
+        """
+        print(f"Time per phase over {self.total_seconds:.1f}s:")
+        for name, seconds in sorted(self.totals.items(), key=lambda item: -item[1]):
+            print(f"  {name:<16} {seconds:8.2f}s {seconds / self.total_seconds:6.1%}")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+@contextmanager
+def profile(kind, path):
+    """Run the enclosed block under cProfile ('cprofile') or torch.profiler ('torch').
+
+    cProfile stats go to `path` (open with pstats or snakeviz); torch
+    profiles are written as a Chrome trace (chrome://tracing) and the
+    slowest ops are printed. kind=None profiles nothing.
+    """
+    if kind is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if kind == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+            print(f"cProfile stats saved to {path}")
+    elif kind == 'torch':
+        import torch.profiler
+        with torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU]) as profiler:
+            yield
+        profiler.export_chrome_trace(path)
+        print(profiler.key_averages().table(sort_by='self_cpu_time_total', row_limit=15))
+        print(f"torch.profiler trace saved to {path}")
+    else:
+        raise ValueError(f"Unknown profiler: {kind}")
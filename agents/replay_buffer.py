@@ -0,0 +1,471 @@
+import numpy as np
+import torch
+
+
+class ReplayBuffer:
+    """Fixed-size ring buffer of transitions stored in contiguous arrays.
+
+    Storage is allocated once at `capacity`, so memory use is known up
+    front: 2 * state_dim float32 values plus an action, reward and done
+    flag per slot. The arrays are torch tensors with NumPy views on top, so
+    writes go through NumPy and sampled batches are gathered straight into
+    reusable torch tensors without building Python tuples.
+
+    With share_memory=True the storage lives in shared memory and can be
+    filled from other processes; pin_memory=True pins the sampled batch
+    tensors when CUDA is available.
+    """
+
+    def __init__(self, capacity, state_dim, share_memory=False, pin_memory=False, seed=None):
+        self.capacity = capacity
+        self.state_dim = state_dim
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        self.rng = np.random.default_rng(seed)
+
+        self.storage = {
+            'states': torch.zeros((capacity, state_dim), dtype=torch.float32),
+            'actions': torch.zeros(capacity, dtype=torch.int64),
+            'rewards': torch.zeros(capacity, dtype=torch.float32),
+            'next_states': torch.zeros((capacity, state_dim), dtype=torch.float32),
+            'dones': torch.zeros(capacity, dtype=torch.float32),
+        }
+        if share_memory:
+            for tensor in self.storage.values():
+                tensor.share_memory_()
+
+        # NumPy views over the same memory for cheap writes
+        self.states = self.storage['states'].numpy()
+        self.actions = self.storage['actions'].numpy()
+        self.rewards = self.storage['rewards'].numpy()
+        self.next_states = self.storage['next_states'].numpy()
+        self.dones = self.storage['dones'].numpy()
+
+        self.position = 0
+        self.size = 0
+        self._batches = {}
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return sum(t.element_size() * t.nelement() for t in self.storage.values())
+
+    def add(self, state, action, reward, next_state, done):
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return [i]
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Append a batch of transitions, wrapping around the ring; returns their slots"""
+        idx = (self.position + np.arange(len(actions))) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self.position = int((idx[-1] + 1) % self.capacity)
+        self.size = min(self.size + len(actions), self.capacity)
+        return idx
+
+    def sample_indices(self, batch_size):
+        return self.rng.integers(0, self.size, size=batch_size)
+
+    def sample(self, batch_size):
+        """Return (states, actions, rewards, next_states, dones) tensors.
+
+        The returned tensors are reused by the next call with the same
+        batch size, so consume them before sampling again.
+        """
+        return self.gather(self.sample_indices(batch_size))
+
+    def gather(self, indices):
+        idx = torch.from_numpy(np.asarray(indices, dtype=np.int64))
+        batch = self._batch_tensors(len(idx))
+        for name, out in batch.items():
+            torch.index_select(self.storage[name], 0, idx, out=out)
+        return (batch['states'], batch['actions'], batch['rewards'],
+                batch['next_states'], batch['dones'])
+
+    def _batch_tensors(self, batch_size):
+        batch = self._batches.get(batch_size)
+        if batch is None:
+            batch = {
+                name: torch.empty((batch_size,) + tuple(tensor.shape[1:]), dtype=tensor.dtype)
+                for name, tensor in self.storage.items()
+            }
+            if self.pin_memory:
+                batch = {name: tensor.pin_memory() for name, tensor in batch.items()}
+            self._batches[batch_size] = batch
+        return batch
+
+
+class SegmentTree:
+    """Array-backed binary segment tree over a power-of-two number of leaves.
+
+    Leaves live at [size, 2 * size) and node i combines children 2i and
+    2i + 1 with `op`. Batch updates recompute only the touched ancestors,
+    one tree level per NumPy call.
+    """
+
+    def __init__(self, capacity, op, neutral):
+        self.size = 1
+        while self.size < capacity:
+            self.size *= 2
+        self.op = op
+        self.neutral = neutral
+        self.tree = np.full(2 * self.size, neutral, dtype=np.float64)
+
+    def update(self, indices, values):
+        nodes = np.asarray(indices, dtype=np.int64) + self.size
+        self.tree[nodes] = values
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.op(self.tree[2 * nodes], self.tree[2 * nodes + 1])
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes // 2)
+
+    def __getitem__(self, indices):
+        return self.tree[np.asarray(indices) + self.size]
+
+    @property
+    def root(self):
+        return self.tree[1]
+
+
+class SumTree(SegmentTree):
+    def __init__(self, capacity):
+        super().__init__(capacity, np.add, 0.0)
+
+    def find_prefix_sum(self, values):
+        """Leaf index for each prefix-sum value, descending all in parallel"""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.size:
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values > left_sum
+            values -= np.where(go_right, left_sum, 0.0)
+            nodes = left + go_right
+        return nodes - self.size
+
+
+class MinTree(SegmentTree):
+    def __init__(self, capacity):
+        super().__init__(capacity, np.minimum, np.inf)
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """Proportional prioritized replay (Schaul et al.) on top of ReplayBuffer.
+
+    Priorities are kept in a sum tree for O(log n) stratified sampling and
+    in a min tree for normalising importance-sampling weights. New
+    transitions get the current max priority so they are replayed at least
+    once; beta is annealed towards 1 on every sample.
+    """
+
+    def __init__(self, capacity, state_dim, alpha=0.6, beta=0.4, beta_increment=1e-4,
+                 epsilon=1e-6, **kwargs):
+        super().__init__(capacity, state_dim, **kwargs)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.sum_tree = SumTree(capacity)
+        self.min_tree = MinTree(capacity)
+
+    def add(self, state, action, reward, next_state, done):
+        slots = super().add(state, action, reward, next_state, done)
+        self._set_priorities(slots, self.max_priority ** self.alpha)
+        return slots
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        slots = super().add_batch(states, actions, rewards, next_states, dones)
+        self._set_priorities(slots, self.max_priority ** self.alpha)
+        return slots
+
+    def sample_indices(self, batch_size):
+        # Stratified: one uniform draw from each of batch_size equal segments
+        total = self.sum_tree.root
+        bounds = (np.arange(batch_size) + self.rng.random(batch_size)) * (total / batch_size)
+        indices = self.sum_tree.find_prefix_sum(bounds)
+        return np.minimum(indices, self.size - 1)
+
+    def sample_with_weights(self, batch_size):
+        """Sample a prioritized batch.
+
+        Returns (states, actions, rewards, next_states, dones, weights,
+        indices); pass `indices` back to update_priorities with the new
+        TD errors.
+        """
+        indices = self.sample_indices(batch_size)
+        total = self.sum_tree.root
+        probs = self.sum_tree[indices] / total
+        min_prob = self.min_tree.root / total
+        weights = (probs / min_prob) ** -self.beta
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        weights = torch.from_numpy(weights.astype(np.float32))
+        return self.gather(indices) + (weights, indices)
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self._set_priorities(indices, priorities ** self.alpha)
+
+    def _set_priorities(self, indices, priorities):
+        if len(indices) == 0:
+            return
+        self.sum_tree.update(indices, priorities)
+        self.min_tree.update(indices, priorities)
+
+    def _invalidate(self, indices):
+        """Stop sampling the given slots (zero priority, ignored by the min tree)"""
+        self.sum_tree.update(indices, 0.0)
+        self.min_tree.update(indices, np.inf)
+
+
+
+# Row kinds of CompactReplayBuffer
+STATE_ONLY = 0   # empty, or the next state of a transition stored in a row of its own
+TRANSITION = 1   # a complete transition that can be sampled
+PENDING = 2      # a transition whose next state has not been placed yet
+
+
+def column_index(columns):
+    """A slice for contiguous column indices (cheaper to gather), else the index array"""
+    if len(columns) and columns[-1] - columns[0] == len(columns) - 1:
+        return slice(int(columns[0]), int(columns[-1]) + 1)
+    return columns
+
+
+class CompactReplayBuffer(ReplayBuffer):
+    """Replay memory that keeps states as int8 values and packed bits.
+
+    `bit_columns` marks the 0/1 columns of the state vector (visited
+    cells, has_gold, percepts); they are stored with np.packbits and every
+    other column as int8, so states must hold integers in [-128, 127].
+
+    Each row of the ring holds one encoded state. A transition's next
+    state is not stored again when a later row holds the same state
+    (normally the next step of the same episode): the transition just
+    points at that row. Until the following add() or add_batch() a
+    transition is pending and not sampled; if none of the rows added by
+    then matches its next state, the next state gets a row of its own.
+    Terminal transitions keep no next state, since the TD target ignores
+    it (their next_states repeat the state).
+
+    gather() expands the selected rows into the same reusable float32
+    tensors as ReplayBuffer, so DQNAgent.replay works unchanged; len()
+    counts sampleable transitions.
+    """
+
+    def __init__(self, capacity, state_dim, bit_columns, share_memory=False, pin_memory=False,
+                 seed=None):
+        self.capacity = capacity
+        self.state_dim = state_dim
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        self.rng = np.random.default_rng(seed)
+
+        bit_columns = np.asarray(bit_columns, dtype=bool)
+        self.num_bits = int(bit_columns.sum())
+        self.int_columns = column_index(np.flatnonzero(~bit_columns))
+        self.bit_columns = column_index(np.flatnonzero(bit_columns))
+
+        self.storage = {
+            'ints': torch.zeros((capacity, state_dim - self.num_bits), dtype=torch.int8),
+            'bits': torch.zeros((capacity, (self.num_bits + 7) // 8), dtype=torch.uint8),
+            'actions': torch.zeros(capacity, dtype=torch.uint8),
+            'rewards': torch.zeros(capacity, dtype=torch.float32),
+            'dones': torch.zeros(capacity, dtype=torch.bool),
+            'next_rows': torch.zeros(capacity, dtype=torch.int32),
+            'kinds': torch.zeros(capacity, dtype=torch.int8),
+        }
+        if share_memory:
+            for tensor in self.storage.values():
+                tensor.share_memory_()
+        self.ints = self.storage['ints'].numpy()
+        self.bits = self.storage['bits'].numpy()
+        self.actions = self.storage['actions'].numpy()
+        self.rewards = self.storage['rewards'].numpy()
+        self.dones = self.storage['dones'].numpy()
+        self.next_rows = self.storage['next_rows'].numpy()
+        self.kinds = self.storage['kinds'].numpy()
+
+        self.position = 0
+        self.size = 0    # rows in use
+        self.count = 0   # sampleable transitions
+        self.pending = {}       # encoded next state -> rows waiting for it
+        self.pending_rows = {}  # row -> (key, ints, bits, add number)
+        self.adds = 0
+        self._batches = {}
+
+    def __len__(self):
+        return self.count
+
+    def encode(self, states):
+        states = np.asarray(states)
+        ints = states[:, self.int_columns].astype(np.int8)
+        bits = np.packbits(states[:, self.bit_columns] != 0, axis=1)
+        return ints, bits
+
+    def decode(self, rows, out):
+        out[:, self.int_columns] = self.ints[rows]
+        out[:, self.bit_columns] = np.unpackbits(self.bits[rows], axis=1, count=self.num_bits)
+
+    @staticmethod
+    def _keys(ints, bits):
+        rows = np.concatenate([ints.view(np.uint8), bits], axis=1)
+        return [row.tobytes() for row in rows]
+
+    def add(self, state, action, reward, next_state, done):
+        return CompactReplayBuffer.add_batch(self, np.asarray(state)[None], [action], [reward],
+                                             np.asarray(next_state)[None], [done])
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Append transitions; returns the rows that became sampleable"""
+        n = len(actions)
+        step = max(1, self.capacity // 4)
+        if n > step:
+            return np.concatenate([
+                CompactReplayBuffer.add_batch(self, states[i:i + step], actions[i:i + step], rewards[i:i + step],
+                               next_states[i:i + step], dones[i:i + step])
+                for i in range(0, n, step)
+            ])
+        ints, bits = self.encode(states)
+        next_ints, next_bits = self.encode(next_states)
+        dones = np.asarray(dones, dtype=bool)
+
+        rows = self._allocate(n)
+        self.ints[rows] = ints
+        self.bits[rows] = bits
+        self.actions[rows] = actions
+        self.rewards[rows] = rewards
+        self.dones[rows] = dones
+        self.next_rows[rows] = rows
+        self.kinds[rows] = PENDING
+        self.adds += 1
+
+        ready = []
+        next_keys = self._keys(next_ints, next_bits)
+        for i, (row, key) in enumerate(zip(rows.tolist(), self._keys(ints, bits))):
+            for owner in self.pending.pop(key, ()):
+                del self.pending_rows[owner]
+                self._complete(owner, row)
+                ready.append(owner)
+            if dones[i]:
+                self._complete(row, row)
+                ready.append(row)
+            else:
+                self.pending.setdefault(next_keys[i], []).append(row)
+                self.pending_rows[row] = (next_keys[i], next_ints[i], next_bits[i], self.adds)
+
+        # Next states nothing matched since the previous add get rows of their own
+        stale = [row for row, entry in self.pending_rows.items() if entry[3] < self.adds]
+        for owner in stale:
+            key, owner_ints, owner_bits, _ = self.pending_rows.pop(owner)
+            self._unwait(key, owner)
+            row = int(self._allocate(1)[0])
+            self.ints[row] = owner_ints
+            self.bits[row] = owner_bits
+            self.next_rows[row] = row
+            self._complete(owner, row)
+            ready.append(owner)
+        return np.array(ready, dtype=np.int64)
+
+    def _allocate(self, n):
+        """Claim the next n rows of the ring, evicting what they held"""
+        rows = (self.position + np.arange(n)) % self.capacity
+        kinds = self.kinds[rows]
+        dropped = rows[kinds == TRANSITION]
+        if len(dropped):
+            self.count -= len(dropped)
+            self._invalidate(dropped)
+        for row in rows[kinds == PENDING].tolist():
+            self._unwait(self.pending_rows.pop(row)[0], row)
+        self.kinds[rows] = STATE_ONLY
+        self.position = int((rows[-1] + 1) % self.capacity)
+        self.size = min(self.size + n, self.capacity)
+        return rows
+
+    def _unwait(self, key, row):
+        waiting = self.pending[key]
+        waiting.remove(row)
+        if not waiting:
+            del self.pending[key]
+
+    def _complete(self, row, next_row):
+        self.next_rows[row] = next_row
+        self.kinds[row] = TRANSITION
+        self.count += 1
+
+    def _invalidate(self, rows):
+        pass
+
+    def sample_indices(self, batch_size):
+        indices = self.rng.integers(0, self.size, size=batch_size)
+        redraw = self.kinds[indices] != TRANSITION
+        while redraw.any():
+            indices[redraw] = self.rng.integers(0, self.size, size=int(redraw.sum()))
+            redraw = self.kinds[indices] != TRANSITION
+        return indices
+
+    def gather(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        batch = self._batch_tensors(len(indices))
+        self.decode(indices, batch['states'].numpy())
+        self.decode(self.next_rows[indices], batch['next_states'].numpy())
+        batch['actions'].numpy()[:] = self.actions[indices]
+        batch['rewards'].numpy()[:] = self.rewards[indices]
+        batch['dones'].numpy()[:] = self.dones[indices]
+        return (batch['states'], batch['actions'], batch['rewards'],
+                batch['next_states'], batch['dones'])
+
+    def _batch_tensors(self, batch_size):
+        batch = self._batches.get(batch_size)
+        if batch is None:
+            batch = {
+                'states': torch.empty((batch_size, self.state_dim), dtype=torch.float32),
+                'actions': torch.empty(batch_size, dtype=torch.int64),
+                'rewards': torch.empty(batch_size, dtype=torch.float32),
+                'next_states': torch.empty((batch_size, self.state_dim), dtype=torch.float32),
+                'dones': torch.empty(batch_size, dtype=torch.float32),
+            }
+            if self.pin_memory:
+                batch = {name: tensor.pin_memory() for name, tensor in batch.items()}
+            self._batches[batch_size] = batch
+        return batch
+
+
+class PrioritizedCompactReplayBuffer(PrioritizedReplayBuffer, CompactReplayBuffer):
+    """Prioritized replay over CompactReplayBuffer storage.
+
+    Rows that are not sampleable transitions (pending ones, stored next
+    states, evicted ones) keep zero priority.
+    """
+
+    def add(self, state, action, reward, next_state, done):
+        return self.add_batch(np.asarray(state)[None], [action], [reward],
+                              np.asarray(next_state)[None], [done])
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        # Evicted rows and newly sampleable ones share one update per tree
+        self._dropped = []
+        ready = CompactReplayBuffer.add_batch(self, states, actions, rewards, next_states, dones)
+        dropped = np.setdiff1d(np.concatenate(self._dropped), ready) if self._dropped else ready[:0]
+        priority = self.max_priority ** self.alpha
+        rows = np.concatenate([ready, dropped])
+        if len(rows):
+            self.sum_tree.update(rows, np.repeat([priority, 0.0], [len(ready), len(dropped)]))
+            self.min_tree.update(rows, np.repeat([priority, np.inf], [len(ready), len(dropped)]))
+        return ready
+
+    def _invalidate(self, rows):
+        self._dropped.append(rows)
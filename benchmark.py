@@ -0,0 +1,381 @@
+"""Throughput and latency benchmarks for the simulator, agent and training loop.
+
+Every benchmark runs on fixed seeds and grid sizes and reports a few
+metrics; names ending in _per_sec are better when higher, everything else
+(_us, _ms) is better when lower. Results are written as JSON and can be
+compared against a stored baseline:
+
+    python benchmark.py --output results/benchmark.json
+    python benchmark.py --baseline results/benchmark.json --threshold 0.15
+
+The comparison exits with status 1 if any metric is worse than the
+baseline by more than the threshold, so it can gate CI or a training job.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import torch
+
+from agents.distributed import state_dim_for
+from agents.dqn_agent import DQNAgent, configure_threads
+from env.vector_env import WumpusVectorEnv
+from env.wumpus_env import WumpusEnv
+from env.wumpus_world import WumpusWorld, PLAYING
+
+GRID_SIZE = 10
+SEED = 0
+# Network backends for act/replay; 'compile' is opt-in (--compile) as it compiles for ~30s
+BACKENDS = ['eager', 'script']
+
+
+def timed(fn, number, repeat=5):
+    """Best per-call time in seconds of `number` calls to fn, over `repeat` runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def random_step_loop(step, reset, done_after, rng, number):
+    """Steps per second of a step/reset pair driven with random actions"""
+    actions = rng.integers(0, 4, size=number)
+
+    def run():
+        for action in actions:
+            if done_after(step(int(action))):
+                reset()
+
+    return number / timed(run, 1)
+
+
+def bench_world(quick):
+    """Raw rules engine (WumpusWorld, which main.Game plays)"""
+    rng = np.random.default_rng(SEED)
+    world = WumpusWorld(GRID_SIZE, rng=rng)
+    number = 5000 if quick else 50000
+    return {
+        'steps_per_sec': random_step_loop(
+            world.step, world.reset,
+            lambda _: world.state != PLAYING or world.steps >= 200, rng, number),
+        'reset_us': timed(world.reset, number // 10) * 1e6,
+    }
+
+
+def bench_env(quick):
+    """Gymnasium WumpusEnv step and reset"""
+    env = WumpusEnv(grid_size=GRID_SIZE, adaptive=False)
+    env.reset(seed=SEED)
+    rng = np.random.default_rng(SEED)
+    number = 2000 if quick else 20000
+    return {
+        'steps_per_sec': random_step_loop(env.step, env.reset,
+                                          lambda out: out[2] or out[3], rng, number),
+        'reset_us': timed(env.reset, number // 10) * 1e6,
+    }
+
+
+def bench_vector_env(quick):
+    """Batched NumPy WumpusVectorEnv (steps counted per world)"""
+    n = 1024
+    venv = WumpusVectorEnv(n, grid_size=GRID_SIZE, adaptive=False, seed=SEED)
+    venv.reset(seed=SEED)
+    actions = np.random.default_rng(SEED).integers(0, 4, size=(10 if quick else 100, n))
+    step_time = timed(lambda: [venv.step(a) for a in actions], 1)
+    return {
+        'steps_per_sec': actions.size / step_time,
+        'reset_us_per_world': timed(lambda: venv.reset_worlds(np.arange(n)), 10) / n * 1e6,
+    }
+
+
+def benchmark_agent(state_dim, **kwargs):
+    torch.manual_seed(SEED)
+    agent = DQNAgent(state_dim=state_dim, action_dim=4, **kwargs)
+    agent.rng = np.random.default_rng(SEED)
+    return agent
+
+
+def sample_observations(env, n):
+    env.reset(seed=SEED)
+    rng = np.random.default_rng(SEED)
+    observations = []
+    for action in rng.integers(0, 4, size=n):
+        obs, _, terminated, truncated, _ = env.step(int(action))
+        observations.append(obs)
+        if terminated or truncated:
+            env.reset()
+    return observations
+
+
+def bench_preprocess(quick):
+    """Observation dict -> flat state vector"""
+    env = WumpusEnv(grid_size=GRID_SIZE, adaptive=False)
+    agent = benchmark_agent(None, observation_space=env.observation_space)
+    observations = sample_observations(env, 256)
+    batch = {key: np.stack([obs[key] for obs in observations]) for key in observations[0]}
+    number = 20 if quick else 200
+    out = np.empty(agent.state_dim, dtype=np.float32)
+    return {
+        'state_us': timed(lambda: [agent.preprocess_state(obs) for obs in observations],
+                          number) / len(observations) * 1e6,
+        'state_into_buffer_us': timed(lambda: [agent.preprocess_state(obs, out) for obs in observations],
+                                      number) / len(observations) * 1e6,
+        'batch_us_per_row': timed(lambda: agent.preprocess_batch(batch), number)
+                            / len(observations) * 1e6,
+    }
+
+
+def backend_prefix(backend):
+    """Metric name prefix of a network backend (none for eager, to keep old baselines comparable)"""
+    return '' if backend == 'eager' else f'{backend}_'
+
+
+def bench_act(quick):
+    """Greedy action selection latency per network backend.
+
+    train_step_us times replay(), act() and act_batch() back to back, the
+    way the training loop interleaves them, so every backend has to act
+    with a network that has just been run with autograd. It runs first:
+    scripted networks of one class share their compiled graphs, and the
+    act-only timings would otherwise have specialized them already.
+    """
+    env = WumpusEnv(grid_size=GRID_SIZE, adaptive=False)
+    results = {}
+    for backend in BACKENDS:
+        agent = benchmark_agent(state_dim_for(env.observation_space), network_backend=backend)
+        states = np.array([agent.preprocess_state(obs) for obs in sample_observations(env, 1024)])
+        number = 200 if quick else 2000
+        prefix = backend_prefix(backend)
+
+        n = len(states) - 1
+        agent.memory.add_batch(states[:-1], np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.float32),
+                               states[1:], np.zeros(n, dtype=bool))
+
+        def train_step():
+            agent.replay()
+            agent.act(states[0], training=False)
+            agent.act_batch(states, training=False)
+
+        steps, repeat = number // 20, 5
+        results[f'{prefix}train_step_us'] = timed(train_step, steps, repeat=repeat) * 1e6
+        # replay() reports its errors instead of raising them
+        if len(agent.losses) != steps * repeat:
+            raise RuntimeError(f"replay() failed with the {backend} network backend")
+
+        results[f'{prefix}act_us'] = timed(lambda: agent.act(states[0], training=False), number) * 1e6
+        results[f'{prefix}act_batch_us_per_state'] = timed(
+            lambda: agent.act_batch(states, training=False), number // 20) / len(states) * 1e6
+    return results
+
+
+def stream_transitions(agent, n_envs, steps):
+    """Per-step transition batches of WumpusVectorEnv worlds driven with random actions"""
+    venv = WumpusVectorEnv(n_envs, grid_size=GRID_SIZE, adaptive=False, seed=SEED)
+    obs, _ = venv.reset(seed=SEED)
+    rng = np.random.default_rng(SEED)
+    batches = []
+    states = agent.preprocess_batch(obs)
+    for _ in range(steps):
+        actions = rng.integers(0, 4, size=n_envs)
+        obs, rewards, terminations, truncations, infos = venv.step(actions)
+        next_obs_states = agent.preprocess_batch(obs)
+        next_states = next_obs_states.copy()
+        for i in np.flatnonzero(terminations | truncations):
+            agent.preprocess_state(infos['final_obs'][i], out=next_states[i])
+        batches.append((states, actions, rewards, next_states, terminations))
+        states = next_obs_states
+    return batches
+
+
+def bench_replay(quick):
+    """DQNAgent.replay gradient updates from a full replay memory.
+
+    The memory is filled by streaming random-action episodes of 64 worlds,
+    as training does, so bytes_per_transition is the memory per stored
+    transition (compact storage links next states to later rows, so its
+    rows and transitions only match on real trajectories). Covers float and
+    compact storage with eager networks, float storage with a fused Adam
+    step, and float storage with every other network backend.
+    """
+    env = WumpusEnv(grid_size=GRID_SIZE, adaptive=False)
+    agent = benchmark_agent(None, observation_space=env.observation_space)
+    n_envs = 64
+    batches = stream_transitions(agent, n_envs, agent.memory.capacity // n_envs + 1)
+    # (name, prioritized, compact, backend, fused Adam): one change at a time against eager
+    configs = [('uniform', False, False, 'eager', False), ('prioritized', True, False, 'eager', False),
+               ('compact_uniform', False, True, 'eager', False),
+               ('compact_prioritized', True, True, 'eager', False),
+               ('fused_uniform', False, False, 'eager', True),
+               ('fused_prioritized', True, False, 'eager', True)]
+    configs += [(backend_prefix(backend) + name, prioritized, False, backend, False)
+                for backend in BACKENDS if backend != 'eager'
+                for name, prioritized in [('uniform', False), ('prioritized', True)]]
+    results = {}
+    for name, prioritized, compact, backend, fused in configs:
+        agent = benchmark_agent(None, prioritized_replay=prioritized, compact_replay=compact,
+                                observation_space=env.observation_space, network_backend=backend,
+                                fused_optimizer=fused)
+        agent.memory.rng = np.random.default_rng(SEED)
+        for batch in batches:
+            agent.memory.add_batch(*batch)
+        number = 50 if quick else 500
+        results[f'{name}_updates_per_sec'] = 1 / timed(agent.replay, number)
+        if backend == 'eager' and not fused:
+            results[f'{name}_bytes_per_transition'] = agent.memory.nbytes / len(agent.memory)
+    return results
+
+
+def bench_sb3(quick):
+    """Stable-Baselines3 PPO rollout collection (no gradient updates) at 8 and 32 envs"""
+    from stable_baselines3 import PPO
+    from train import make_training_vec_env
+
+    results = {}
+    for n_envs in [8, 32]:
+        # 8-env metrics keep their original names so old baselines stay comparable
+        suffix = '' if n_envs == 8 else f'_{n_envs}envs'
+        for backend in ['dummy', 'batched']:
+            venv = make_training_vec_env(n_envs, backend, seed=SEED)
+            model = PPO("MultiInputPolicy", venv, n_steps=64 if quick else 256, verbose=0, seed=SEED)
+            _, callback = model._setup_learn(model.n_steps * venv.num_envs)
+            callback.on_training_start(locals(), globals())
+            seconds = timed(lambda: model.collect_rollouts(model.env, callback, model.rollout_buffer,
+                                                           model.n_steps), 1, repeat=3)
+            results[f'{backend}{suffix}_steps_per_sec'] = model.n_steps * venv.num_envs / seconds
+            venv.close()
+    return results
+
+
+def bench_render(quick):
+    """Game.draw frame time (full redraw and idle frame) and offscreen rgb_array frames"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import main
+    from env.render import render_world
+
+    game = main.Game()
+    game.world = WumpusWorld(main.GRID_SIZE, rng=np.random.default_rng(SEED))
+    game.game_state = PLAYING
+    for dx, dy in [(-1, 0), (0, 1), (-1, 0)]:
+        game.move_player(dx, dy)
+
+    def full_frame():
+        game.invalidate()
+        game.draw(main.SCREEN)
+
+    number = 20 if quick else 200
+    return {
+        'full_frame_ms': timed(full_frame, number) * 1e3,
+        'idle_frame_us': timed(lambda: game.draw(main.SCREEN), number * 10) * 1e6,
+        'rgb_array_ms': timed(lambda: render_world(game.world, GRID_SIZE), number) * 1e3,
+    }
+
+
+BENCHMARKS = {
+    'world': bench_world,
+    'env': bench_env,
+    'vector_env': bench_vector_env,
+    'preprocess': bench_preprocess,
+    'act': bench_act,
+    'replay': bench_replay,
+    'sb3': bench_sb3,
+    'render': bench_render,
+}
+
+
+def run_benchmarks(names=None, quick=False):
+    results = {}
+    for name in names or BENCHMARKS:
+        start = time.perf_counter()
+        results[name] = BENCHMARKS[name](quick)
+        metrics = ', '.join(f'{metric} {value:,.2f}' for metric, value in results[name].items())
+        print(f"{name:<12} {metrics}  ({time.perf_counter() - start:.1f}s)")
+    return results
+
+
+def higher_is_better(metric):
+    return metric.endswith('_per_sec')
+
+
+def compare(results, baseline, threshold=0.1):
+    """Relative change of every metric against a baseline run.
+
+    Returns a list of (benchmark, metric, baseline, current, change,
+    regressed) where change > 0 always means faster and regressed is true
+    when the metric got worse by more than `threshold`.
+    """
+    rows = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(name, {}).get(metric)
+            if not old:
+                continue
+            change = value / old - 1 if higher_is_better(metric) else old / value - 1
+            rows.append((name, metric, old, value, change, change < -threshold))
+    return rows
+
+
+def environment_info(quick):
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'torch': torch.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'torch_threads': torch.get_num_threads(),
+        'torch_interop_threads': torch.get_num_interop_threads(),
+        'quick': quick,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Wumpus World hot paths")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=None)
+    parser.add_argument('--quick', action='store_true', help="fewer iterations (noisier)")
+    parser.add_argument('--threads', type=int, default=1, help="torch intra-op threads")
+    parser.add_argument('--interop-threads', type=int, default=1, help="torch inter-op threads")
+    parser.add_argument('--compile', action='store_true',
+                        help="also benchmark torch.compile networks in act and replay (slow to compile)")
+    parser.add_argument('--output', default=None, help="write the results to this JSON file")
+    parser.add_argument('--baseline', default=None, help="JSON file of a previous run to compare with")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    configure_threads(args.threads, args.interop_threads)
+    if args.compile:
+        BACKENDS.append('compile')
+    run = {'environment': environment_info(args.quick), 'results': run_benchmarks(args.only, args.quick)}
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=4)
+        print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(run['results'], baseline['results'], args.threshold)
+        print(f"\nCompared with {args.baseline} ({baseline['environment']['timestamp']}):")
+        for name, metric, old, value, change, regressed in rows:
+            flag = 'REGRESSION' if regressed else ''
+            print(f"{name + '.' + metric:<40} {old:>14,.2f} -> {value:>14,.2f} {change:+7.1%} {flag}")
+        regressions = sum(row[-1] for row in rows)
+        if regressions:
+            print(f"{regressions} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
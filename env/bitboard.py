@@ -0,0 +1,94 @@
+"""Bitboard helpers for compact Wumpus World state.
+
+A single world stores cell sets (pits, visited cells, breeze, stench) as
+Python int bitboards with bit x * size + y for cell (x, y), so membership
+is one shift-and-mask and neighbours are four shifts. Batches of worlds use
+packed uint64 arrays of shape (N, words) over a fixed board of `cells` bits.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+
+def cell_bit(x, y, size):
+    return 1 << (x * size + y)
+
+
+def contains(board, x, y, size):
+    return (board >> (x * size + y)) & 1 == 1
+
+
+def from_cells(cells, size):
+    board = 0
+    for x, y in cells:
+        board |= 1 << (x * size + y)
+    return board
+
+
+@lru_cache(maxsize=None)
+def _masks(size):
+    full = (1 << (size * size)) - 1
+    left_col = from_cells(((x, 0) for x in range(size)), size)
+    right_col = from_cells(((x, size - 1) for x in range(size)), size)
+    return full, full & ~left_col, full & ~right_col
+
+
+def neighbours(board, size):
+    """Cells sharing an edge with any cell of the board (shift based)"""
+    full, not_left, not_right = _masks(size)
+    return (((board << size) | (board >> size)
+             | ((board << 1) & not_left) | ((board >> 1) & not_right)) & full)
+
+
+def to_grid(board, size):
+    """Expand a bitboard into a (size, size) boolean NumPy grid"""
+    data = board.to_bytes((size * size + 7) // 8, 'little')
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder='little')
+    return bits[:size * size].reshape(size, size).astype(bool)
+
+
+def adjacent_cells(mask):
+    """Cells sharing an edge with any True cell of a boolean grid.
+
+    Works on the last two axes, so a batch of (N, size, size) grids is
+    handled in one call.
+    """
+    adjacent = np.zeros_like(mask)
+    adjacent[..., 1:, :] |= mask[..., :-1, :]
+    adjacent[..., :-1, :] |= mask[..., 1:, :]
+    adjacent[..., :, 1:] |= mask[..., :, :-1]
+    adjacent[..., :, :-1] |= mask[..., :, 1:]
+    return adjacent
+
+
+def words_for(cells):
+    return (cells + 63) // 64
+
+
+def pack_masks(masks):
+    """Pack (N, cells) boolean masks into (N, words) uint64 arrays"""
+    masks = np.asarray(masks, dtype=bool)
+    n, cells = masks.shape
+    padded = np.zeros((n, words_for(cells) * 64), dtype=bool)
+    padded[:, :cells] = masks
+    return np.packbits(padded, axis=1, bitorder='little').view(np.uint64)
+
+
+def unpack_masks(packed, cells):
+    """Inverse of pack_masks: (N, words) uint64 -> (N, cells) boolean"""
+    bits = np.unpackbits(np.ascontiguousarray(packed).view(np.uint8), axis=1, bitorder='little')
+    return bits[:, :cells].astype(bool)
+
+
+def set_bits(packed, rows, cells):
+    """Set bit `cells[i]` of row `rows[i]` in a packed (N, words) array"""
+    cells = np.asarray(cells, dtype=np.uint64)
+    np.bitwise_or.at(packed, (rows, (cells >> np.uint64(6)).astype(np.intp)),
+                     np.uint64(1) << (cells & np.uint64(63)))
+
+
+def test_bits(packed, rows, cells):
+    """Whether bit `cells[i]` of row `rows[i]` is set"""
+    cells = np.asarray(cells, dtype=np.uint64)
+    words = packed[rows, (cells >> np.uint64(6)).astype(np.intp)]
+    return ((words >> (cells & np.uint64(63))) & np.uint64(1)).astype(bool)
@@ -0,0 +1,88 @@
+import numpy as np
+
+from env import bitboard
+
+
+def generate_worlds(rng, n, grid_size, num_pits, solvable=False):
+    """Generate n random worlds of one grid size from a numpy Generator.
+
+    Everything comes from a single (n, cells + 1) draw of uniform keys.
+    The extra column picks the wumpus uniformly outside the bottom row.
+    The start and wumpus cells are then blocked, and the smallest remaining
+    key is the gold; the next num_pits smallest are the pits. Every cell is
+    therefore distinct without any rejection loop. The same rng state
+    always yields the same worlds.
+
+    With solvable=True, worlds where no pit- and wumpus-free path leads
+    from the start to the gold are redrawn until every world is solvable.
+
+    Returns a dict of arrays: 'wumpus' (n, 2), 'gold' (n, 2) and
+    'pits' (n, num_pits, 2), all int32 [x, y] positions.
+    """
+    cells = grid_size * grid_size
+    if num_pits > cells - 3:
+        raise ValueError(f"{num_pits} pits do not fit on a {grid_size}x{grid_size} grid")
+    rows = np.arange(n)
+    start = (grid_size - 1) * grid_size
+
+    draw = rng.random((n, cells + 1))
+    # Wumpus never starts on the bottom row, which is the last grid_size cells
+    wumpus = (draw[:, -1] * (cells - grid_size)).astype(np.int64)
+    keys = draw[:, :cells]
+    keys[:, start] = np.inf
+    keys[rows, wumpus] = np.inf
+    gold = keys.argmin(axis=1)
+    keys[rows, gold] = np.inf
+    if num_pits > 0:
+        pits = np.sort(np.argpartition(keys, num_pits - 1, axis=1)[:, :num_pits], axis=1)
+    else:
+        pits = np.zeros((n, 0), dtype=np.int64)
+
+    worlds = {
+        'wumpus': np.stack(np.divmod(wumpus, grid_size), axis=1).astype(np.int32),
+        'gold': np.stack(np.divmod(gold, grid_size), axis=1).astype(np.int32),
+        'pits': np.stack(np.divmod(pits, grid_size), axis=2).astype(np.int32),
+    }
+
+    if solvable:
+        unsolvable = np.flatnonzero(~gold_reachable(worlds, grid_size))
+        if len(unsolvable):
+            redrawn = generate_worlds(rng, len(unsolvable), grid_size, num_pits, solvable=True)
+            for key, value in redrawn.items():
+                worlds[key][unsolvable] = value
+    return worlds
+
+
+def world_masks(worlds, grid_size, board_size=None):
+    """Pit, wumpus, gold, breeze and stench masks for a batch of worlds.
+
+    Masks are boolean (n, board_size, board_size) arrays with the worlds in
+    the top-left grid_size x grid_size corner (board_size defaults to
+    grid_size).
+    """
+    board_size = board_size or grid_size
+    n = len(worlds['gold'])
+    rows = np.arange(n)
+    masks = {name: np.zeros((n, board_size, board_size), dtype=bool)
+             for name in ('pit', 'wumpus', 'gold')}
+    pits = worlds['pits']
+    masks['pit'][rows[:, None].repeat(pits.shape[1], 1), pits[..., 0], pits[..., 1]] = True
+    masks['wumpus'][rows, worlds['wumpus'][:, 0], worlds['wumpus'][:, 1]] = True
+    masks['gold'][rows, worlds['gold'][:, 0], worlds['gold'][:, 1]] = True
+    masks['breeze'] = bitboard.adjacent_cells(masks['pit'])
+    masks['stench'] = bitboard.adjacent_cells(masks['wumpus'])
+    return masks
+
+
+def gold_reachable(worlds, grid_size):
+    """Whether the gold can be reached from the start without entering a pit or the wumpus"""
+    masks = world_masks(worlds, grid_size)
+    free = ~(masks['pit'] | masks['wumpus'])
+    reached = np.zeros_like(free)
+    reached[:, grid_size - 1, 0] = True
+    while True:
+        grown = (reached | bitboard.adjacent_cells(reached)) & free
+        if (grown == reached).all():
+            break
+        reached = grown
+    return (reached & masks['gold']).any(axis=(1, 2))
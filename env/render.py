@@ -0,0 +1,181 @@
+"""Offscreen rendering of Wumpus worlds to RGB arrays.
+
+Nothing here opens a window, so frames can be captured on headless
+servers. Every look a cell can have is drawn once with pygame into a tile
+atlas; a frame is then just atlas[codes] rearranged, which renders a whole
+batch of worlds (e.g. every world of a WumpusVectorEnv) with one NumPy
+gather and no per-cell blits.
+
+Cell codes: 0 is an unvisited cell, 1 is off the board (padding when
+worlds are smaller than the frame) and visited cells are
+2 + ((((breeze * 2 + stench) * 5 + player) * 2 + wumpus) * 2 + gold) * 2 + pit,
+where player is 0 without the agent and 1 + its ACTIONS facing index.
+"""
+import os
+from functools import lru_cache
+
+import numpy as np
+import pygame
+
+from env import bitboard
+from env.wumpus_world import ACTIONS
+
+CELL_SIZE = 60
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+DARK_GRAY = (64, 64, 64)
+
+UNVISITED = 0
+OFF_BOARD = 1
+NUM_CODES = 2 + 2 * 2 * 5 * 2 * 2 * 2
+
+
+# Load and scale images
+def load_image(name):
+    try:
+        path = os.path.join('assets', f'{name}.png')
+        image = pygame.image.load(path)
+        return pygame.transform.scale(image, (CELL_SIZE, CELL_SIZE))
+    except:
+        surface = pygame.Surface((CELL_SIZE, CELL_SIZE))
+        surface.fill(WHITE)
+        pygame.draw.rect(surface, BLACK, surface.get_rect(), 1)
+        print(f"Couldn't load image {name}, using fallback")
+        return surface
+
+
+# Game assets
+IMAGES = {
+    'empty': load_image('empty'),
+    'agent': load_image('agent'),
+    'wumpus': load_image('wumpus'),
+    'pit': load_image('pit'),
+    'gold': load_image('gold'),
+    'breeze': load_image('breeze'),
+    'stench': load_image('stench')
+}
+
+# Agent sprite pre-rotated for every facing direction
+AGENT_SPRITES = {
+    direction: pygame.transform.rotate(IMAGES['agent'], angle)
+    for direction, angle in [((0, 1), 0), ((-1, 0), 90), ((1, 0), -90), ((0, -1), 180)]
+}
+
+
+def draw_tile(surface, rect, breeze=False, stench=False, direction=None, wumpus=False,
+              gold=False, pit=False):
+    """Draw a visited cell; `direction` is the agent's facing (dx, dy) if it is there"""
+    pygame.draw.rect(surface, DARK_GRAY, rect)
+    if breeze:
+        surface.blit(IMAGES['breeze'], rect)
+    if stench:
+        surface.blit(IMAGES['stench'], rect)
+    if direction is not None:
+        surface.blit(AGENT_SPRITES[direction], rect)
+    if wumpus:
+        surface.blit(IMAGES['wumpus'], rect)
+    if gold:
+        surface.blit(IMAGES['gold'], rect)
+    if pit:
+        surface.blit(IMAGES['pit'], rect)
+    pygame.draw.rect(surface, WHITE, rect, 1)
+
+
+@lru_cache(maxsize=None)
+def tile_atlas(cell_size=CELL_SIZE):
+    """(NUM_CODES, cell_size, cell_size, 3) uint8 array of every cell look"""
+    atlas = np.zeros((NUM_CODES, CELL_SIZE, CELL_SIZE, 3), dtype=np.uint8)
+    tile = pygame.Surface((CELL_SIZE, CELL_SIZE))
+    rect = tile.get_rect()
+
+    tile.fill(BLACK)
+    pygame.draw.rect(tile, WHITE, rect, 1)
+    atlas[UNVISITED] = pygame.surfarray.array3d(tile).transpose(1, 0, 2)
+    for code in range(2, NUM_CODES):
+        rest, pit = divmod(code - 2, 2)
+        rest, gold = divmod(rest, 2)
+        rest, wumpus = divmod(rest, 2)
+        rest, player = divmod(rest, 5)
+        breeze, stench = divmod(rest, 2)
+        direction = ACTIONS[player - 1] if player else None
+        draw_tile(tile, rect, breeze, stench, direction, wumpus, gold, pit)
+        atlas[code] = pygame.surfarray.array3d(tile).transpose(1, 0, 2)
+
+    if cell_size != CELL_SIZE:
+        # Nearest-neighbour resample keeps the atlas a plain array gather
+        pick = np.arange(cell_size) * CELL_SIZE // cell_size
+        atlas = np.ascontiguousarray(atlas[:, pick][:, :, pick])
+    return atlas
+
+
+def cell_codes(visited, breeze, stench, player, wumpus, gold, pit, on_board=None):
+    """Per-cell atlas codes from boolean (..., H, W) grids.
+
+    `player` holds 0 where the agent is not and 1 + its facing ACTIONS index
+    where it is. Cells outside `on_board` (if given) become OFF_BOARD.
+    """
+    code = ((((breeze.astype(np.int64) * 2 + stench) * 5 + player) * 2 + wumpus) * 2 + gold) * 2 + pit
+    codes = np.where(visited, 2 + code, UNVISITED)
+    if on_board is not None:
+        codes = np.where(on_board, codes, OFF_BOARD)
+    return codes
+
+
+def composite_frames(codes, cell_size=CELL_SIZE):
+    """Assemble (N, H, W) cell codes into (N, H * cell_size, W * cell_size, 3) frames"""
+    codes = np.asarray(codes)
+    n, h, w = codes.shape
+    tiles = tile_atlas(cell_size)[codes]
+    return tiles.transpose(0, 1, 3, 2, 4, 5).reshape(n, h * cell_size, w * cell_size, 3)
+
+
+def world_codes(world, board_size=None):
+    """(board_size, board_size) cell codes for a WumpusWorld"""
+    size = world.grid_size
+    board_size = board_size or size
+    player = np.zeros((size, size), dtype=np.int64)
+    player[tuple(world.player_pos)] = 1 + ACTIONS.index(world.last_direction)
+    wumpus = np.zeros((size, size), dtype=bool)
+    if world.wumpus_pos is not None:
+        wumpus[tuple(world.wumpus_pos)] = True
+    codes = np.full((board_size, board_size), OFF_BOARD, dtype=np.int64)
+    codes[:size, :size] = cell_codes(bitboard.to_grid(world.visited_bits, size),
+                                     world.breeze_grid, world.stench_grid, player, wumpus,
+                                     world.gold_grid, world.pit_grid)
+    return codes
+
+
+def render_world(world, board_size=None, cell_size=CELL_SIZE):
+    """RGB frame (H, W, 3) of a WumpusWorld as the game shows it, without a display"""
+    return composite_frames(world_codes(world, board_size)[None], cell_size)[0]
+
+
+def vector_env_codes(venv):
+    """(num_envs, max_grid_size, max_grid_size) cell codes for a WumpusVectorEnv"""
+    n, size = venv.num_envs, venv.max_grid_size
+    rows = np.arange(n)
+
+    def grid(packed):
+        return bitboard.unpack_masks(packed, venv.cells).reshape(n, size, size)
+
+    player = np.zeros((n, size, size), dtype=np.int64)
+    player[rows, venv.player[:, 0], venv.player[:, 1]] = 1 + venv.last_action
+    wumpus = np.zeros((n, size, size), dtype=bool)
+    wumpus[rows, venv.wumpus[:, 0], venv.wumpus[:, 1]] = venv.wumpus_alive
+    gold = np.zeros((n, size, size), dtype=bool)
+    gold[rows, venv.gold[:, 0], venv.gold[:, 1]] = True
+    on_board = np.arange(size) < venv.sizes[:, None]
+    on_board = on_board[:, :, None] & on_board[:, None, :]
+    return cell_codes(grid(venv.visited_bits), grid(venv.breeze_bits), grid(venv.stench_bits),
+                      player, wumpus, gold, grid(venv.pit_bits), on_board)
+
+
+def render_vector_env(venv, cell_size=CELL_SIZE):
+    """(num_envs, H, W, 3) frames of every world in a WumpusVectorEnv.
+
+    Frames cover max_grid_size x max_grid_size cells with smaller worlds
+    padded by black off-board cells. Use a small cell_size (e.g. 16) to keep
+    large batches in memory.
+    """
+    return composite_frames(vector_env_codes(venv), cell_size)
@@ -0,0 +1,221 @@
+"""Columnar on-disk trajectory logs.
+
+A TrajectoryWriter buffers transitions column by column and writes them as
+compressed NumPy .npz shards (shard_000000.npz, ...) once `shard_size`
+rows have accumulated. Every row holds:
+
+    episode, world, step      int64 / int64 / int32 ids (world is the suite
+                              index, -1 for generated worlds)
+    grid_size, position       uint8 and (2,) int8, before the action
+    percepts                  (2,) int8 breeze/stench, before the action
+    action, reward            int8 (SHOOT for arrows in the game) / float32
+    done, truncated           bool
+
+plus every observation key as obs_<key> and next_obs_<key> (int8; all
+values fit for grids up to 127x127). A small meta.json next to the shards
+holds the next free episode id, so a new writer can continue a directory
+without opening its shards.
+
+TrajectoryReader streams the shards back in fixed-size batches, holding
+one shard in memory at a time.
+"""
+import glob
+import json
+import os
+
+import numpy as np
+
+from env.wumpus_world import ACTIONS
+
+# Action code for shooting an arrow (only the human game can shoot)
+SHOOT = len(ACTIONS)
+
+COLUMN_DTYPES = {
+    'episode': np.int64,
+    'world': np.int64,
+    'step': np.int32,
+    'grid_size': np.uint8,
+    'position': np.int8,
+    'percepts': np.int8,
+    'action': np.int8,
+    'reward': np.float32,
+    'done': bool,
+    'truncated': bool,
+}
+OBS_DTYPE = np.int8
+META_FILE = 'meta.json'
+
+
+class TrajectoryWriter:
+    """Append transitions to compressed .npz shards in a directory.
+
+    add() records one transition and keeps episode/step counters itself;
+    add_batch() takes explicit episode and step ids for batched envs (get
+    fresh ids from new_episodes()). New shards continue the numbering of
+    shards already in the directory, and each shard is written to a
+    temporary file first so readers never see a partial one.
+    """
+
+    def __init__(self, directory, shard_size=100000):
+        self.directory = directory
+        self.shard_size = shard_size
+        os.makedirs(directory, exist_ok=True)
+        paths = shard_paths(directory)
+        self.shard_index = len(paths)
+        self.next_episode = 0
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.next_episode = json.load(f)['next_episode']
+        elif paths:
+            # Directory without meta.json: the newest episodes are in the last shard
+            with np.load(paths[-1]) as shard:
+                if len(shard['episode']):
+                    self.next_episode = int(shard['episode'].max()) + 1
+        self.episode = None
+        self.step = 0
+        self.columns = {}
+        self.rows = 0
+        self.total_rows = 0
+
+    def new_episodes(self, n):
+        """Reserve n fresh episode ids"""
+        ids = self.next_episode + np.arange(n)
+        self.next_episode += n
+        return ids
+
+    def add(self, obs, action, reward, next_obs, done, truncated=False, world=-1):
+        """Record one transition of a single-world episode"""
+        if self.episode is None:
+            self.episode = int(self.new_episodes(1)[0])
+        self.add_batch({key: value[None] for key, value in obs.items()}, [action], [reward],
+                       {key: value[None] for key, value in next_obs.items()},
+                       [done], [truncated], [self.episode], [self.step], [world])
+        self.step += 1
+        if done or truncated:
+            self.end_episode()
+
+    def end_episode(self):
+        """Start a new episode on the next add(), e.g. when a game is abandoned"""
+        self.episode = None
+        self.step = 0
+
+    def add_batch(self, obs, actions, rewards, next_obs, dones, truncateds, episodes, steps,
+                  worlds=None):
+        """Record a batch of transitions; obs/next_obs are batched observation dicts"""
+        n = len(actions)
+        batch = {
+            'episode': episodes,
+            'world': np.full(n, -1) if worlds is None else worlds,
+            'step': steps,
+            'action': actions,
+            'reward': rewards,
+            'done': dones,
+            'truncated': truncateds,
+            'grid_size': np.asarray(obs['grid_size']).reshape(n),
+            'position': obs['player_pos'],
+            'percepts': obs['percepts'],
+        }
+        for key, value in obs.items():
+            batch[f'obs_{key}'] = value
+        for key, value in next_obs.items():
+            batch[f'next_obs_{key}'] = value
+
+        for name, value in batch.items():
+            dtype = COLUMN_DTYPES.get(name, OBS_DTYPE)
+            self.columns.setdefault(name, []).append(np.asarray(value).astype(dtype, copy=False))
+        self.rows += n
+        self.total_rows += n
+        if self.rows >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows as one shard"""
+        if self.rows == 0:
+            return
+        columns = {name: np.concatenate(parts) for name, parts in self.columns.items()}
+        path = os.path.join(self.directory, f'shard_{self.shard_index:06d}.npz')
+        with open(path + '.tmp', 'wb') as f:
+            np.savez_compressed(f, **columns)
+        os.replace(path + '.tmp', path)
+        meta_path = os.path.join(self.directory, META_FILE)
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump({'next_episode': int(self.next_episode)}, f)
+        os.replace(meta_path + '.tmp', meta_path)
+        self.shard_index += 1
+        self.columns = {}
+        self.rows = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def shard_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, 'shard_*.npz')))
+
+
+class TrajectoryReader:
+    """Stream transitions from the shards of one or more TrajectoryWriter directories"""
+
+    def __init__(self, directory):
+        self.directories = [directory] if isinstance(directory, str) else list(directory)
+
+    @property
+    def shards(self):
+        return [path for directory in self.directories for path in shard_paths(directory)]
+
+    def __len__(self):
+        total = 0
+        for path in self.shards:
+            with np.load(path) as shard:
+                total += len(shard['done'])
+        return total
+
+    def iter_shards(self, columns=None, rng=None, paths=None):
+        """Yield each shard as a dict of columns (in random shard order with an rng).
+
+        `paths` reads those shards in the given order instead, e.g. one
+        worker's share of a shuffled shard list.
+        """
+        if paths is None:
+            paths = self.shards
+            if rng is not None:
+                paths = [paths[i] for i in rng.permutation(len(paths))]
+        for path in paths:
+            with np.load(path) as shard:
+                yield {name: shard[name] for name in (columns or shard.files)}
+
+    def iter_batches(self, batch_size=65536, columns=None, rng=None, drop_last=False, paths=None):
+        """Yield dicts of column arrays with batch_size rows each.
+
+        Rows are streamed shard by shard; leftovers are carried into the
+        next shard so every batch but the last is full. With an rng, shard
+        order and the rows inside each shard are shuffled. `paths` is
+        passed on to iter_shards().
+        """
+        carry = None
+        for shard in self.iter_shards(columns, rng, paths):
+            n = len(next(iter(shard.values())))
+            if rng is not None:
+                order = rng.permutation(n)
+                shard = {name: column[order] for name, column in shard.items()}
+            if carry is not None:
+                shard = {name: np.concatenate([carry[name], column]) for name, column in shard.items()}
+            n = len(next(iter(shard.values())))
+            end = n - n % batch_size
+            for start in range(0, end, batch_size):
+                yield {name: column[start:start + batch_size] for name, column in shard.items()}
+            carry = {name: column[end:] for name, column in shard.items()}
+        if carry is not None and len(next(iter(carry.values()))) and not drop_last:
+            yield carry
+
+
+def observations(batch, prefix='obs_'):
+    """Observation dict (as the envs return it) from the obs_/next_obs_ columns of a batch"""
+    return {name[len(prefix):]: column for name, column in batch.items() if name.startswith(prefix)}
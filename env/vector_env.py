@@ -0,0 +1,299 @@
+from collections import deque
+
+import numpy as np
+import gymnasium as gym
+from gymnasium import spaces
+from gymnasium.vector.utils import batch_space
+
+from env import bitboard
+from env.generator import generate_worlds, world_masks
+from env.wumpus_env import make_observation_space, num_pits_for, next_grid_size
+from env.wumpus_world import ACTIONS, EXPLORE_SCORE, CARRY_GOLD_SCORE, GOLD_SCORE, WIN_SCORE
+
+ACTION_DELTAS = np.array(ACTIONS, dtype=np.int32)
+# Generated worlds are made this many at a time and handed out in order
+WORLD_POOL_SIZE = 256
+
+
+class WumpusVectorEnv(gym.vector.VectorEnv):
+    """Steps N Wumpus worlds at once with NumPy array state.
+
+    Follows the same rules, rewards and observation layout as WumpusEnv,
+    but every world lives in a row of a batch array: positions are (N, 2)
+    int arrays and pits / breeze / stench / visited cells are packed
+    (N, words) uint64 bitboards over a max_grid_size x max_grid_size board
+    (see env.bitboard). Finished worlds are reset in the
+    same step; their last observation is returned in infos['final_obs'].
+
+    With a WorldSuite, new worlds are looked up in the pre-generated suite
+    instead of being generated, either at random ('random') or in a fixed
+    order per env slot ('sequential'): on its k-th episode slot i plays
+    world `suite_offset + i + k * num_envs` of the current grid size, so
+    which world an episode gets does not depend on how long the episodes
+    before it took. Sequential runs never wrap around the suite; running
+    past its end raises ValueError. With `suite_episodes` the run is
+    limited to that many worlds, and slots that have played their share
+    replay one of them (those episodes are outside the run). The suite
+    index of each finished world is returned in infos['world_index'].
+    """
+
+    metadata = {"render_modes": ["rgb_array"], "autoreset_mode": gym.vector.AutoresetMode.SAME_STEP}
+
+    def __init__(self, num_envs, min_grid_size=4, max_grid_size=10, grid_size=None,
+                 max_steps=200, death_penalty=-1000, adaptive=True, window=20, seed=None,
+                 solvable=False, suite=None, suite_order='random', suite_offset=0,
+                 suite_episodes=None, render_mode=None, render_cell_size=16):
+        if suite_order not in ('random', 'sequential'):
+            raise ValueError(f"Unknown suite order: {suite_order}")
+        self.num_envs = num_envs
+        self.min_grid_size = min_grid_size
+        self.max_grid_size = max_grid_size
+        self.max_entities = max_grid_size
+        self.grid_size = min_grid_size if grid_size is None else grid_size
+        self.max_steps = max_steps
+        self.death_penalty = death_penalty
+        self.adaptive = adaptive
+        self.recent_wins = deque(maxlen=window)
+        self.solvable = solvable
+        self.rng = np.random.default_rng(seed)
+        self.suite = suite
+        self.render_mode = render_mode
+        self.render_cell_size = render_cell_size
+        self.suite_order = suite_order
+        self.suite_offset = suite_offset
+        self.suite_episodes = suite_episodes
+        self.suite_cursor = {}
+        self.world_pool = None
+        if suite is not None and suite_order == 'sequential' and suite_episodes is not None:
+            count = suite.index_range(self.grid_size)[1]
+            if suite_offset + suite_episodes > count:
+                raise ValueError(f"{suite_episodes} episodes from world {suite_offset} on need more "
+                                 f"than the {count} suite worlds of size {self.grid_size}")
+
+        self.single_action_space = spaces.Discrete(len(ACTIONS))
+        self.single_observation_space = make_observation_space(max_grid_size, self.max_entities)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        n, cells = num_envs, max_grid_size * max_grid_size
+        words = bitboard.words_for(cells)
+        self.cells = cells
+        self.sizes = np.full(n, self.grid_size, dtype=np.int32)
+        self.player = np.zeros((n, 2), dtype=np.int32)
+        self.wumpus = np.zeros((n, 2), dtype=np.int32)
+        self.wumpus_alive = np.ones(n, dtype=bool)
+        self.gold = np.zeros((n, 2), dtype=np.int32)
+        self.has_gold = np.zeros(n, dtype=bool)
+        self.pit_positions = np.full((n, self.max_entities, 2), -1, dtype=np.int32)
+        self.pit_bits = np.zeros((n, words), dtype=np.uint64)
+        self.breeze_bits = np.zeros((n, words), dtype=np.uint64)
+        self.stench_bits = np.zeros((n, words), dtype=np.uint64)
+        self.visited_bits = np.zeros((n, words), dtype=np.uint64)
+        self.steps = np.zeros(n, dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.episode_reward = np.zeros(n, dtype=np.float64)
+        self.world_index = np.full(n, -1, dtype=np.int64)
+        self.last_action = np.full(n, ACTIONS.index((0, 1)), dtype=np.int64)
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+            self.world_pool = None
+        self.recent_wins.clear()
+        self.suite_cursor = {}
+        self.reset_worlds(np.arange(self.num_envs))
+        return self._get_obs(), self._get_info()
+
+    def reset_worlds(self, idx):
+        """Start fresh worlds (generated or from the suite) for the given batch indices"""
+        n = len(idx)
+        if n == 0:
+            return
+        sizes = np.full(n, self.grid_size, dtype=np.int32)
+        start = np.stack([sizes - 1, np.zeros(n, dtype=np.int32)], axis=1)
+
+        if self.suite is None:
+            worlds, bits = self.generate(n)
+        else:
+            worlds, bits = self.load_from_suite(idx)
+        pit_positions = np.full((n, self.max_entities, 2), -1, dtype=np.int32)
+        pit_positions[:, :worlds['pits'].shape[1]] = worlds['pits']
+
+        self.sizes[idx] = sizes
+        self.player[idx] = start
+        self.last_action[idx] = ACTIONS.index((0, 1))
+        self.wumpus[idx] = worlds['wumpus']
+        self.wumpus_alive[idx] = True
+        self.gold[idx] = worlds['gold']
+        self.has_gold[idx] = False
+        self.pit_positions[idx] = pit_positions
+        self.world_index[idx] = worlds.get('index', -1)
+        for name in ('pit', 'breeze', 'stench'):
+            getattr(self, f'{name}_bits')[idx] = bits[name]
+        self.visited_bits[idx] = 0
+        bitboard.set_bits(self.visited_bits, idx, start[:, 0] * self.max_grid_size + start[:, 1])
+        self.steps[idx] = 0
+        self.score[idx] = 0
+        self.episode_reward[idx] = 0
+
+    def generate(self, n):
+        """n fresh worlds of the current grid size and their packed pit/breeze/stench bits.
+
+        Worlds come from a pool generated WORLD_POOL_SIZE at a time, so
+        auto-resetting the few worlds that finish in a step does not pay the
+        fixed cost of generate_worlds() and the mask packing every time.
+        """
+        pool = self.world_pool
+        if pool is None or pool['grid_size'] != self.grid_size or pool['next'] + n > pool['count']:
+            count = max(n, WORLD_POOL_SIZE)
+            num_pits = num_pits_for(self.grid_size, self.max_entities)
+            worlds = generate_worlds(self.rng, count, self.grid_size, num_pits, solvable=self.solvable)
+            masks = world_masks(worlds, self.grid_size, self.max_grid_size)
+            bits = {name: bitboard.pack_masks(masks[name].reshape(count, self.cells))
+                    for name in ('pit', 'breeze', 'stench')}
+            pool = self.world_pool = {'grid_size': self.grid_size, 'next': 0, 'count': count,
+                                      'worlds': worlds, 'bits': bits}
+        start = pool['next']
+        pool['next'] += n
+        return ({key: value[start:start + n] for key, value in pool['worlds'].items()},
+                {key: value[start:start + n] for key, value in pool['bits'].items()})
+
+    def load_from_suite(self, idx):
+        """Look up suite worlds of the current grid size for batch indices idx and re-lay their bits"""
+        n = len(idx)
+        size, max_size = self.grid_size, self.max_grid_size
+        offset, count = self.suite.index_range(size)
+        if self.suite_order == 'sequential':
+            # Episodes started per slot (and grid size) since the last reset
+            started = self.suite_cursor.setdefault(size, np.zeros(self.num_envs, dtype=np.int64))
+            positions = idx + started[idx] * self.num_envs
+            started[idx] += 1
+            if self.suite_episodes is not None:
+                positions = np.where(positions < self.suite_episodes, positions,
+                                     idx % self.suite_episodes)
+            positions += self.suite_offset
+            if (positions >= count).any():
+                raise ValueError(f"Sequential episodes ran past the {count} suite worlds of size "
+                                 f"{size} (suite_offset {self.suite_offset})")
+            indices = offset + positions
+        else:
+            indices = offset + self.rng.integers(0, count, size=n)
+        rows = self.suite.get(indices)
+
+        num_pits = num_pits_for(size, self.max_entities)
+        worlds = {
+            'index': indices,
+            'wumpus': rows['wumpus'],
+            'gold': rows['gold'],
+            'pits': rows['pits'][:, :num_pits],
+        }
+        bits = {}
+        for name in ('pit', 'breeze', 'stench'):
+            grid = bitboard.unpack_masks(rows[f'{name}_bits'], size * size).reshape(n, size, size)
+            mask = np.zeros((n, max_size, max_size), dtype=bool)
+            mask[:, :size, :size] = grid
+            bits[name] = bitboard.pack_masks(mask.reshape(n, self.cells))
+        return worlds, bits
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        rows = np.arange(self.num_envs)
+        max_size = self.max_grid_size
+
+        self.last_action[:] = actions
+        new_pos = self.player + ACTION_DELTAS[actions]
+        moved = ((new_pos >= 0) & (new_pos < self.sizes[:, None])).all(axis=1)
+        self.player[moved] = new_pos[moved]
+        cell = self.player[:, 0] * max_size + self.player[:, 1]
+        bitboard.set_bits(self.visited_bits, rows[moved], cell[moved])
+
+        score = np.where(moved, EXPLORE_SCORE, 0)
+        score += np.where(moved & self.has_gold, CARRY_GOLD_SCORE, 0)
+
+        eaten = moved & self.wumpus_alive & (self.player == self.wumpus).all(axis=1)
+        fell_in_pit = moved & bitboard.test_bits(self.pit_bits, rows, cell)
+        died = eaten | fell_in_pit
+        alive = moved & ~died
+
+        got_gold = alive & ~self.has_gold & (self.player == self.gold).all(axis=1)
+        self.has_gold |= got_gold
+        score += np.where(got_gold, GOLD_SCORE, 0)
+
+        at_start = (self.player[:, 0] == self.sizes - 1) & (self.player[:, 1] == 0)
+        won = alive & self.has_gold & at_start
+        score += np.where(won, WIN_SCORE, 0)
+
+        self.score += score
+        self.steps += 1
+        rewards = score.astype(np.float64) + np.where(died, self.death_penalty, 0)
+        self.episode_reward += rewards
+
+        terminations = died | won
+        truncations = ~terminations & (self.steps >= self.max_steps)
+        done = terminations | truncations
+
+        infos = self._get_info()
+        infos['won'] = won
+        infos['died'] = died
+        infos['eaten'] = eaten
+        infos['fell_in_pit'] = fell_in_pit
+        infos['got_gold'] = got_gold
+        obs = self._get_obs()
+        if done.any():
+            done_idx = np.flatnonzero(done)
+            final_obs = {key: value[done_idx] for key, value in obs.items()}
+            infos['final_obs'] = np.full(self.num_envs, None, dtype=object)
+            for j, i in enumerate(done_idx):
+                infos['final_obs'][i] = {key: value[j] for key, value in final_obs.items()}
+            infos['_final_obs'] = done.copy()
+            infos['episode'] = {
+                'r': np.where(done, self.episode_reward, 0.0),
+                'l': np.where(done, self.steps, 0),
+            }
+            infos['_episode'] = done.copy()
+            infos['world_index'] = self.world_index.copy()
+
+            self.recent_wins.extend(won[done_idx])
+            if self.adaptive:
+                self.grid_size = next_grid_size(self.grid_size, self.recent_wins,
+                                                self.min_grid_size, self.max_grid_size)
+            self.reset_worlds(done_idx)
+            # Only the reset worlds need a fresh observation
+            for key, value in self._get_obs(done_idx).items():
+                obs[key][done_idx] = value
+
+        return obs, rewards, terminations, truncations, infos
+
+    def render(self):
+        """(num_envs, H, W, 3) frames of every world, composited from the tile atlas"""
+        if self.render_mode == 'rgb_array':
+            from env.render import render_vector_env
+            return render_vector_env(self, self.render_cell_size)
+
+    def _get_obs(self, idx=None):
+        """Batched observation of every world, or of the worlds in idx"""
+        sel = slice(None) if idx is None else idx
+        rows = np.arange(self.num_envs) if idx is None else idx
+        n = len(rows)
+        player = self.player[sel]
+        cell = player[:, 0] * self.max_grid_size + player[:, 1]
+        alive = self.wumpus_alive[sel]
+        wumpus = np.full((n, self.max_entities * 2), -1, dtype=np.int32)
+        wumpus[alive, :2] = self.wumpus[sel][alive]
+        return {
+            'grid_size': self.sizes[sel, None].copy(),
+            'player_pos': player.copy(),
+            'wumpus_positions': wumpus,
+            'pit_positions': self.pit_positions[sel].reshape(n, -1).copy(),
+            'gold_position': self.gold[sel].copy(),
+            'has_gold': self.has_gold[sel, None].astype(np.int8),
+            'percepts': np.stack([bitboard.test_bits(self.breeze_bits, rows, cell),
+                                  bitboard.test_bits(self.stench_bits, rows, cell)], axis=1).astype(np.int8),
+            'visited_cells': bitboard.unpack_masks(self.visited_bits[sel], self.cells).view(np.int8),
+        }
+
+    def _get_info(self):
+        return {
+            'score': self.score.copy(),
+            'grid_size': self.sizes.copy(),
+        }
@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from env import bitboard
+from env.generator import generate_worlds, world_masks
+from env.wumpus_env import num_pits_for
+
+COLUMNS = ['grid_size', 'wumpus', 'gold', 'pits', 'pit_bits', 'breeze_bits', 'stench_bits']
+
+
+def build_suite(path, grid_sizes, per_size, seed=0, solvable=False, max_entities=None,
+                chunk_size=100000):
+    """Pre-generate a fixed world suite into memory-mappable .npy files.
+
+    For every grid size, `per_size` worlds are generated with a Generator
+    seeded from `seed` and stored contiguously. Each world is stored as its
+    grid size, wumpus and gold positions, pit positions (padded with -1)
+    and packed pit / breeze / stench bitboards on the world's own grid
+    (bit x * grid_size + y, as in WumpusWorld). The columns are written in
+    chunks through open_memmap, so suites larger than RAM can be built.
+    """
+    grid_sizes = sorted(grid_sizes)
+    max_entities = max_entities or max(grid_sizes)
+    max_pits = max(num_pits_for(size, max_entities) for size in grid_sizes)
+    words = bitboard.words_for(max(grid_sizes) ** 2)
+    n = per_size * len(grid_sizes)
+
+    os.makedirs(path, exist_ok=True)
+    shapes = {
+        'grid_size': ((n,), np.uint8),
+        'wumpus': ((n, 2), np.int16),
+        'gold': ((n, 2), np.int16),
+        'pits': ((n, max_pits, 2), np.int16),
+        'pit_bits': ((n, words), np.uint64),
+        'breeze_bits': ((n, words), np.uint64),
+        'stench_bits': ((n, words), np.uint64),
+    }
+    columns = {
+        name: np.lib.format.open_memmap(os.path.join(path, f'{name}.npy'), mode='w+',
+                                        dtype=dtype, shape=shape)
+        for name, (shape, dtype) in shapes.items()
+    }
+
+    rng = np.random.default_rng(seed)
+    ranges = {}
+    for offset, size in zip(range(0, n, per_size), grid_sizes):
+        num_pits = num_pits_for(size, max_entities)
+        ranges[size] = [offset, per_size]
+        for start in range(0, per_size, chunk_size):
+            count = min(chunk_size, per_size - start)
+            rows = slice(offset + start, offset + start + count)
+            worlds = generate_worlds(rng, count, size, num_pits, solvable=solvable)
+            masks = world_masks(worlds, size)
+
+            columns['grid_size'][rows] = size
+            columns['wumpus'][rows] = worlds['wumpus']
+            columns['gold'][rows] = worlds['gold']
+            columns['pits'][rows] = -1
+            columns['pits'][rows, :num_pits] = worlds['pits']
+            for name in ('pit', 'breeze', 'stench'):
+                packed = bitboard.pack_masks(masks[name].reshape(count, size * size))
+                columns[f'{name}_bits'][rows] = 0
+                columns[f'{name}_bits'][rows, :packed.shape[1]] = packed
+
+    for column in columns.values():
+        column.flush()
+    meta = {
+        'size': n,
+        'grid_sizes': grid_sizes,
+        'ranges': {str(size): r for size, r in ranges.items()},
+        'max_pits': max_pits,
+        'max_entities': max_entities,
+        'seed': seed,
+        'solvable': solvable,
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=4)
+    return WorldSuite(path)
+
+
+class WorldSuite:
+    """Read-only, memory-mapped view of a suite written by build_suite.
+
+    Columns are opened with mmap_mode='r', so opening a suite costs nothing
+    and every process that opens the same path shares the OS page cache.
+    Pickling only sends the path, which keeps handing a suite to worker
+    processes cheap.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.columns = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+            for name in COLUMNS
+        }
+        self.ranges = {int(size): tuple(r) for size, r in self.meta['ranges'].items()}
+
+    def __len__(self):
+        return self.meta['size']
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    @property
+    def grid_sizes(self):
+        return self.meta['grid_sizes']
+
+    def index_range(self, grid_size):
+        """(offset, count) of the worlds stored for a grid size"""
+        if grid_size not in self.ranges:
+            raise ValueError(f"Suite {self.path} has no {grid_size}x{grid_size} worlds")
+        return self.ranges[grid_size]
+
+    def sample_indices(self, rng, grid_size, n):
+        offset, count = self.index_range(grid_size)
+        return offset + rng.integers(0, count, size=n)
+
+    def get(self, indices):
+        """Columns for the given world indices (only those rows are read)"""
+        return {name: column[indices] for name, column in self.columns.items()}
+
+    def layout(self, index):
+        """Layout dict for WumpusWorld.reset(layout=...)"""
+        size = int(self.columns['grid_size'][index])
+        pits = self.columns['pits'][index]
+        nbytes = self.columns['pit_bits'].shape[1] * 8
+        to_int = lambda words: int.from_bytes(np.asarray(words).tobytes()[:nbytes], 'little')
+        return {
+            'grid_size': size,
+            'wumpus': self.columns['wumpus'][index].tolist(),
+            'gold': self.columns['gold'][index].tolist(),
+            'pits': pits[pits[:, 0] >= 0].tolist(),
+            'pit_bits': to_int(self.columns['pit_bits'][index]),
+            'breeze_bits': to_int(self.columns['breeze_bits'][index]),
+            'stench_bits': to_int(self.columns['stench_bits'][index]),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate a memory-mapped Wumpus world suite")
+    parser.add_argument('path', help="output directory")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(range(4, 11)))
+    parser.add_argument('--per-size', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--solvable', action='store_true')
+    parser.add_argument('--max-entities', type=int, default=None)
+    args = parser.parse_args()
+
+    suite = build_suite(args.path, args.sizes, args.per_size, args.seed, args.solvable,
+                        args.max_entities)
+    print(f"Wrote {len(suite)} worlds ({', '.join(map(str, suite.grid_sizes))}) to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
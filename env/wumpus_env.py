@@ -0,0 +1,165 @@
+from collections import deque
+
+import numpy as np
+import gymnasium as gym
+from gymnasium import spaces
+
+from env import bitboard
+from env.wumpus_world import WumpusWorld, PLAYING, WON, LOST, ACTIONS
+
+
+def make_observation_space(max_grid_size, max_entities):
+    """Dict observation space shared by the single and vectorized envs"""
+    cells = max_grid_size * max_grid_size
+    return spaces.Dict({
+        'grid_size': spaces.Box(0, max_grid_size, shape=(1,), dtype=np.int32),
+        'player_pos': spaces.Box(-1, max_grid_size, shape=(2,), dtype=np.int32),
+        'wumpus_positions': spaces.Box(-1, max_grid_size, shape=(max_entities * 2,), dtype=np.int32),
+        'pit_positions': spaces.Box(-1, max_grid_size, shape=(max_entities * 2,), dtype=np.int32),
+        'gold_position': spaces.Box(-1, max_grid_size, shape=(2,), dtype=np.int32),
+        'has_gold': spaces.Box(0, 1, shape=(1,), dtype=np.int8),
+        'percepts': spaces.Box(0, 1, shape=(2,), dtype=np.int8),  # breeze, stench
+        'visited_cells': spaces.Box(0, 1, shape=(cells,), dtype=np.int8),
+    })
+
+
+def world_observation(world, max_grid_size, max_entities):
+    """Observation dict of a WumpusWorld, padded to max_grid_size"""
+    x, y = world.player_pos
+
+    wumpus = np.full(max_entities * 2, -1, dtype=np.int32)
+    if world.wumpus_pos is not None:
+        wumpus[:2] = world.wumpus_pos
+    pits = np.full(max_entities * 2, -1, dtype=np.int32)
+    if world.pits:
+        pits[:len(world.pits) * 2] = np.ravel(world.pits)
+    visited = np.zeros((max_grid_size, max_grid_size), dtype=np.int8)
+    visited[:world.grid_size, :world.grid_size] = bitboard.to_grid(world.visited_bits, world.grid_size)
+
+    return {
+        'grid_size': np.array([world.grid_size], dtype=np.int32),
+        'player_pos': np.array(world.player_pos, dtype=np.int32),
+        'wumpus_positions': wumpus,
+        'pit_positions': pits,
+        'gold_position': np.array(world.gold_pos, dtype=np.int32),
+        'has_gold': np.array([world.has_gold], dtype=np.int8),
+        'percepts': np.array([world.breeze_grid[x, y], world.stench_grid[x, y]], dtype=np.int8),
+        'visited_cells': visited.ravel(),
+    }
+
+
+def num_pits_for(grid_size, max_entities):
+    """Pit count for a grid size: about 10% of the cells"""
+    return min(max_entities, max(1, grid_size * grid_size // 10))
+
+
+def next_grid_size(grid_size, recent_wins, min_grid_size, max_grid_size):
+    """Grow the grid above a 70% win rate and shrink it below 30%.
+
+    Clears recent_wins whenever the size changes so the next decision is
+    based on episodes played at the new difficulty.
+    """
+    if len(recent_wins) < recent_wins.maxlen:
+        return grid_size
+    success_rate = sum(recent_wins) / len(recent_wins)
+    if success_rate > 0.7 and grid_size < max_grid_size:
+        recent_wins.clear()
+        return grid_size + 1
+    if success_rate < 0.3 and grid_size > min_grid_size:
+        recent_wins.clear()
+        return grid_size - 1
+    return grid_size
+
+
+class WumpusEnv(gym.Env):
+    """Gymnasium environment for the adaptive Wumpus World.
+
+    Thin wrapper over WumpusWorld. The grid grows when the agent wins more
+    than 70% of its recent episodes and shrinks below 30%. Observations are
+    padded to max_grid_size so the space stays fixed across difficulties.
+
+    With a WorldSuite, worlds are read from the pre-generated suite instead
+    of being generated: reset picks a random suite world of the current
+    grid size, or the one given by options={'world_index': i}, and keeps its
+    index in `world_index` (-1 for generated worlds).
+    """
+
+    metadata = {"render_modes": ["rgb_array"], "render_fps": 4}
+
+    def __init__(self, min_grid_size=4, max_grid_size=10, grid_size=None,
+                 max_steps=200, death_penalty=-1000, adaptive=True, window=20, solvable=False,
+                 suite=None, render_mode=None):
+        super().__init__()
+        self.min_grid_size = min_grid_size
+        self.max_grid_size = max_grid_size
+        self.max_entities = max_grid_size
+        self.grid_size = min_grid_size if grid_size is None else grid_size
+        self.max_steps = max_steps
+        self.death_penalty = death_penalty
+        self.adaptive = adaptive
+        self.recent_wins = deque(maxlen=window)
+        self.solvable = solvable
+        self.suite = suite
+        self.render_mode = render_mode
+
+        self.action_space = spaces.Discrete(len(ACTIONS))
+        self.observation_space = make_observation_space(max_grid_size, self.max_entities)
+
+        self.world = None
+        self.episode_reward = 0
+
+    def num_pits(self, grid_size):
+        return num_pits_for(grid_size, self.max_entities)
+
+    def adjust_difficulty(self):
+        if self.adaptive:
+            self.grid_size = next_grid_size(self.grid_size, self.recent_wins,
+                                            self.min_grid_size, self.max_grid_size)
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self.adjust_difficulty()
+        layout = None
+        self.world_index = -1
+        if self.suite is not None:
+            if options and 'world_index' in options:
+                index = options['world_index']
+            else:
+                index = self.suite.sample_indices(self.np_random, self.grid_size, 1)[0]
+            layout = self.suite.layout(index)
+            self.world_index = int(index)
+            self.grid_size = layout['grid_size']
+        self.world = WumpusWorld(self.grid_size, self.num_pits(self.grid_size),
+                                 rng=self.np_random, solvable=self.solvable, layout=layout)
+        self.episode_reward = 0
+        return self._get_obs(), self._get_info()
+
+    def step(self, action):
+        reward, _ = self.world.step(int(action))
+        terminated = self.world.state != PLAYING
+        truncated = not terminated and self.world.steps >= self.max_steps
+        if self.world.state == LOST:
+            reward += self.death_penalty
+        self.episode_reward += reward
+
+        info = self._get_info()
+        if terminated or truncated:
+            self.recent_wins.append(self.world.state == WON)
+            info['episode'] = {'r': self.episode_reward, 'l': self.world.steps}
+        return self._get_obs(), float(reward), terminated, truncated, info
+
+    def render(self):
+        """rgb_array frame of the world padded to max_grid_size (see env.render)"""
+        if self.render_mode == 'rgb_array':
+            from env.render import render_world
+            return render_world(self.world, self.max_grid_size)
+
+    def _get_obs(self):
+        return world_observation(self.world, self.max_grid_size, self.max_entities)
+
+    def _get_info(self):
+        return {
+            'score': self.world.score,
+            'grid_size': self.world.grid_size,
+            'outcome': self.world.state,
+        }
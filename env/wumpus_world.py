@@ -0,0 +1,186 @@
+import numpy as np
+
+from env import bitboard
+from env.generator import generate_worlds
+
+# Game States
+PLAYING = "playing"
+WON = "won"
+LOST = "lost"
+
+# Actions as (dx, dy) offsets: up, down, left, right
+ACTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+# Score values
+EXPLORE_SCORE = 5
+CARRY_GOLD_SCORE = 10
+GOLD_SCORE = 1000
+WIN_SCORE = 2000
+KILL_SCORE = 200
+
+
+class WumpusWorld:
+    """Headless Hunt the Wumpus rules engine.
+
+    Holds the full world state and applies the game rules without touching
+    pygame. Rule methods return a list of event names ('move', 'gold',
+    'death', 'win', 'kill', 'miss', 'no_arrows') so front-ends can play
+    sounds or show messages on their own.
+
+    Pits, visited cells, breeze and stench are int bitboards (see
+    env.bitboard) used by the rules for O(1) membership. Boolean
+    (grid_size, grid_size) grids pit_grid, gold_grid, breeze_grid and
+    stench_grid are expanded from them once per world for rendering and
+    observations.
+    """
+
+    def __init__(self, grid_size=10, num_pits=None, rng=None, solvable=False, layout=None):
+        self.grid_size = grid_size
+        self.num_pits = grid_size if num_pits is None else num_pits
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.solvable = solvable
+        self.reset(layout)
+
+    @property
+    def start_pos(self):
+        return [self.grid_size - 1, 0]
+
+    def reset(self, layout=None):
+        """Start a new game, on a random world or on a fixed layout.
+
+        `layout` is a dict with 'wumpus', 'gold' and 'pits' positions and
+        optionally precomputed 'pit_bits', 'breeze_bits' and 'stench_bits'
+        bitboards, as returned by WorldSuite.layout().
+        """
+        self.player_pos = self.start_pos
+        self.wumpus_pos = None
+        self.gold_pos = None
+        self.pits = []
+        self.score = 0
+        self.state = PLAYING
+        self.has_gold = False
+        self.visited_bits = bitboard.cell_bit(*self.start_pos, self.grid_size)
+        self.arrows = 1
+        self.last_direction = (0, 1)  # Default facing right
+        self.steps = 0
+        if layout is None:
+            self.initialize_game()
+        else:
+            self.load_layout(layout)
+
+    def initialize_game(self):
+        world = generate_worlds(self.rng, 1, self.grid_size, self.num_pits, self.solvable)
+        self.wumpus_pos = world['wumpus'][0].tolist()
+        self.gold_pos = world['gold'][0].tolist()
+        self.pits = world['pits'][0].tolist()
+        self.build_percepts()
+
+    def load_layout(self, layout):
+        self.wumpus_pos = list(layout['wumpus'])
+        self.gold_pos = list(layout['gold'])
+        self.pits = [list(pos) for pos in layout['pits']]
+        self.build_percepts(layout.get('pit_bits'), layout.get('breeze_bits'),
+                            layout.get('stench_bits'))
+
+    def build_percepts(self, pit_bits=None, breeze_bits=None, stench_bits=None):
+        size = self.grid_size
+        if pit_bits is None:
+            pit_bits = bitboard.from_cells(self.pits, size)
+            breeze_bits = bitboard.neighbours(pit_bits, size)
+            stench_bits = 0
+            if self.wumpus_pos is not None:
+                stench_bits = bitboard.neighbours(bitboard.cell_bit(*self.wumpus_pos, size), size)
+        self.pit_bits = pit_bits
+        self.breeze_bits = breeze_bits
+        self.stench_bits = stench_bits
+
+        self.pit_grid = bitboard.to_grid(self.pit_bits, size)
+        self.breeze_grid = bitboard.to_grid(self.breeze_bits, size)
+        self.stench_grid = bitboard.to_grid(self.stench_bits, size)
+        self.gold_grid = np.zeros((size, size), dtype=bool)
+        self.gold_grid[tuple(self.gold_pos)] = True
+
+    def step(self, action):
+        """Apply one of ACTIONS by index and return (score delta, events)"""
+        score = self.score
+        events = self.move_player(*ACTIONS[action])
+        return self.score - score, events
+
+    def shoot_arrow(self):
+        if self.arrows <= 0:
+            return ['no_arrows']
+
+        # Get the target position based on player's facing direction
+        dx, dy = self.last_direction
+        target = [self.player_pos[0] + dx, self.player_pos[1] + dy]
+
+        # Check if we hit the wumpus
+        if target == self.wumpus_pos:
+            self.wumpus_pos = None  # Remove the wumpus
+            self.stench_bits = 0
+            self.stench_grid[:] = False
+            self.arrows += 2  # Get 2 more arrows for a successful hit
+            self.score += KILL_SCORE
+            events = ['kill']
+        else:
+            events = ['miss']
+
+        self.arrows -= 1  # Use up one arrow
+        return events
+
+    def move_player(self, dx, dy):
+        if self.state != PLAYING:
+            return []
+
+        # Update facing direction if moving
+        if (dx, dy) != (0, 0):
+            self.last_direction = (dx, dy)
+        self.steps += 1
+
+        new_x = self.player_pos[0] + dx
+        new_y = self.player_pos[1] + dy
+
+        if not (0 <= new_x < self.grid_size and 0 <= new_y < self.grid_size):
+            return []
+
+        self.player_pos = [new_x, new_y]
+        self.visited_bits |= bitboard.cell_bit(new_x, new_y, self.grid_size)
+        self.score += EXPLORE_SCORE  # Points for exploring
+
+        if self.has_gold:
+            self.score += CARRY_GOLD_SCORE  # Bonus for moving with gold
+
+        return ['move'] + self.check_current_position()
+
+    def check_current_position(self):
+        pos = self.player_pos
+
+        # Check for Wumpus or Pit (game over conditions)
+        if pos == self.wumpus_pos or bitboard.contains(self.pit_bits, *pos, self.grid_size):
+            self.state = LOST
+            return ['death']
+
+        events = []
+
+        # Check for Gold
+        if pos == self.gold_pos and not self.has_gold:
+            self.has_gold = True
+            self.score += GOLD_SCORE
+            events.append('gold')
+
+        # Check for Win (back at start with gold)
+        if self.has_gold and pos == self.start_pos:
+            self.state = WON
+            self.score += WIN_SCORE
+            events.append('win')
+
+        return events
+
+    def is_visited(self, pos):
+        return bitboard.contains(self.visited_bits, *pos, self.grid_size)
+
+    def is_adjacent_to_wumpus(self, pos):
+        return bitboard.contains(self.stench_bits, *pos, self.grid_size)
+
+    def is_adjacent_to_pit(self, pos):
+        return bitboard.contains(self.breeze_bits, *pos, self.grid_size)
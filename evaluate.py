@@ -0,0 +1,195 @@
+import argparse
+import json
+
+import numpy as np
+
+from agents.dqn_agent import DQNAgent, NETWORK_BACKENDS
+from env.vector_env import WumpusVectorEnv
+from env.world_suite import WorldSuite
+
+
+def dqn_policy(agent):
+    """Greedy batched policy for a custom DQNAgent"""
+    buffers = {}
+
+    def policy(obs):
+        n = len(obs['player_pos'])
+        if n not in buffers:
+            buffers[n] = np.empty((n, agent.state_dim), dtype=np.float32)
+        return agent.act_batch(agent.preprocess_batch(obs, out=buffers[n]), training=False)
+    return policy
+
+
+def sb3_policy(model, deterministic=True):
+    """Batched policy for a Stable-Baselines3 model"""
+    def policy(obs):
+        actions, _ = model.predict(obs, deterministic=deterministic)
+        return actions
+    return policy
+
+
+def make_policy(policy):
+    """Accept a DQNAgent, an SB3 model or a plain batched obs -> actions callable"""
+    if hasattr(policy, 'act_batch'):
+        return dqn_policy(policy)
+    if hasattr(policy, 'predict'):
+        return sb3_policy(policy)
+    return policy
+
+
+def evaluate_policy_batched(policy, n_episodes=1000, n_envs=256, grid_size=4, seed=0,
+                            max_steps=200, env_kwargs=None, suite=None, baseline=None,
+                            recorder=None):
+    """Run seeded evaluation episodes across a batch of worlds.
+
+    Every step makes one batched policy call for all n_envs worlds. Env
+    slot i plays episodes i, i + n_envs, i + 2 * n_envs, ... of the run, so
+    every slot gets an equal share and short episodes are not
+    over-represented; per-episode results are returned in that order. The
+    difficulty is fixed at `grid_size`. With a WorldSuite episode j plays
+    the suite's j-th world of that size whatever the policy does, so every
+    policy evaluated on the same suite plays the same worlds in the same
+    result order (ValueError if the suite has fewer than n_episodes), and
+    `baseline` (per-world rewards of a reference solver over the whole
+    suite, e.g. agents.oracle.solve_suite(suite)['reward']) adds the mean
+    regret against it. Transitions of the counted episodes are appended to
+    `recorder` (a TrajectoryWriter) if one is given.
+
+    Returns a dict with the per-episode rewards plus mean/std/95% CI of the
+    reward, win rate, pit vs wumpus death rates, timeout rate and the mean
+    number of steps to pick up the gold (over episodes that found it).
+    """
+    policy = make_policy(policy)
+    n_envs = min(n_envs, n_episodes)
+    env_kwargs = dict(env_kwargs or {})
+    if suite is not None:
+        env_kwargs.update(suite=suite, suite_order='sequential', suite_episodes=n_episodes)
+    venv = WumpusVectorEnv(n_envs, grid_size=grid_size, max_steps=max_steps, adaptive=False,
+                           seed=seed, **env_kwargs)
+    quotas = np.array([len(range(i, n_episodes, n_envs)) for i in range(n_envs)])
+    counts = np.zeros(n_envs, dtype=np.int64)
+    gold_step = np.full(n_envs, -1, dtype=np.int64)
+
+    rewards, outcomes, steps_to_gold, world_indices, positions = [], [], [], [], []
+    obs, _ = venv.reset(seed=seed)
+    if recorder is not None:
+        episode_ids = recorder.new_episodes(n_envs)
+    while (counts < quotas).any():
+        steps = venv.steps + 1
+        actions = np.asarray(policy(obs))
+        record, worlds, prev_obs = counts < quotas, venv.world_index.copy(), obs
+        obs, step_rewards, terminations, truncations, infos = venv.step(actions)
+        if recorder is not None:
+            record_transitions(recorder, record, prev_obs, actions, step_rewards, obs, terminations,
+                               truncations, infos, episode_ids, steps - 1, worlds)
+        gold_step = np.where(infos['got_gold'], steps, gold_step)
+        done = (terminations | truncations) & (counts < quotas)
+        for i in np.flatnonzero(done):
+            positions.append(i + counts[i] * n_envs)
+            rewards.append(float(infos['episode']['r'][i]))
+            world_indices.append(int(infos['world_index'][i]))
+            if infos['won'][i]:
+                outcomes.append('won')
+            elif infos['fell_in_pit'][i]:
+                outcomes.append('pit')
+            elif infos['eaten'][i]:
+                outcomes.append('wumpus')
+            else:
+                outcomes.append('timeout')
+            if gold_step[i] >= 0:
+                steps_to_gold.append(int(gold_step[i]))
+        finished = terminations | truncations
+        counts += done
+        gold_step[finished] = -1
+
+    order = np.argsort(positions)
+    rewards = np.array(rewards)[order]
+    outcomes = np.array(outcomes)[order]
+    world_indices = np.array(world_indices, dtype=np.int64)[order].tolist()
+    std = float(rewards.std())
+    results = {
+        'episodes': len(rewards),
+        'rewards': rewards.tolist(),
+        'mean_reward': float(rewards.mean()),
+        'std_reward': std,
+        'ci95_reward': 1.96 * std / np.sqrt(len(rewards)),
+        'win_rate': float((outcomes == 'won').mean()),
+        'pit_death_rate': float((outcomes == 'pit').mean()),
+        'wumpus_death_rate': float((outcomes == 'wumpus').mean()),
+        'timeout_rate': float((outcomes == 'timeout').mean()),
+        'mean_steps_to_gold': float(np.mean(steps_to_gold)) if steps_to_gold else None,
+    }
+    if suite is not None:
+        results['world_indices'] = world_indices
+    if baseline is not None:
+        results['mean_regret'] = float(np.mean(np.asarray(baseline)[world_indices] - rewards))
+    return results
+
+
+def record_transitions(recorder, record, obs, actions, rewards, next_obs, terminations,
+                       truncations, infos, episode_ids, steps, worlds):
+    """Append the `record` rows of one vector env step to a TrajectoryWriter"""
+    done = terminations | truncations
+    next_obs = {key: value.copy() for key, value in next_obs.items()}
+    for i in np.flatnonzero(done):
+        for key, value in infos['final_obs'][i].items():
+            next_obs[key][i] = value
+    rows = np.flatnonzero(record)
+    recorder.add_batch({key: value[rows] for key, value in obs.items()}, actions[rows],
+                       rewards[rows], {key: value[rows] for key, value in next_obs.items()},
+                       terminations[rows], truncations[rows], episode_ids[rows], steps[rows],
+                       worlds[rows])
+    episode_ids[done] = recorder.new_episodes(int(done.sum()))
+
+
+def print_summary(name, results):
+    print(f"{name}: {results['episodes']} episodes, "
+          f"reward {results['mean_reward']:.2f} +/- {results['ci95_reward']:.2f} "
+          f"(std {results['std_reward']:.2f}), win rate {results['win_rate']:.1%}, "
+          f"pit deaths {results['pit_death_rate']:.1%}, "
+          f"wumpus deaths {results['wumpus_death_rate']:.1%}, "
+          f"steps to gold {results['mean_steps_to_gold']}"
+          + (f", regret {results['mean_regret']:.2f}" if 'mean_regret' in results else ""))
+
+
+def load_policy(path, algo, network_backend='eager'):
+    if algo == 'custom_dqn':
+        agent = DQNAgent(None, 4, observation_space=WumpusVectorEnv(1).single_observation_space,
+                         network_backend=network_backend)
+        agent.load(path)
+        return agent
+    from stable_baselines3 import PPO, A2C, DQN
+    return {'PPO': PPO, 'A2C': A2C, 'DQN': DQN}[algo].load(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a trained Wumpus agent")
+    parser.add_argument('model', help="path to a custom DQN .pth or an SB3 .zip")
+    parser.add_argument('--algo', choices=['custom_dqn', 'PPO', 'A2C', 'DQN'], default='custom_dqn')
+    parser.add_argument('--episodes', type=int, default=10000)
+    parser.add_argument('--n-envs', type=int, default=256)
+    parser.add_argument('--grid-size', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--suite', help="pre-generated world suite directory (see env/world_suite.py)")
+    parser.add_argument('--output', help="optional JSON file for the results")
+    parser.add_argument('--network-backend', choices=NETWORK_BACKENDS, default='eager',
+                        help="how a custom DQN runs its network (see agents.dqn_agent.optimize_network)")
+    args = parser.parse_args()
+
+    suite = WorldSuite(args.suite) if args.suite else None
+    baseline = None
+    if suite is not None:
+        from agents.oracle import load_results
+        oracle_results = load_results(suite, 'oracle')
+        baseline = oracle_results['reward'] if oracle_results else None
+    policy = load_policy(args.model, args.algo, args.network_backend)
+    results = evaluate_policy_batched(policy, args.episodes, args.n_envs, args.grid_size, args.seed,
+                                      suite=suite, baseline=baseline)
+    print_summary(args.algo, results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,19 @@
 import pygame
-import random
 import sys
+import argparse
 import os
 import numpy as np
+from functools import lru_cache
+
+from env.wumpus_world import WumpusWorld, PLAYING, WON, LOST, ACTIONS
+from env.wumpus_env import world_observation
+from env.trajectory import TrajectoryWriter, SHOOT
+from env.render import CELL_SIZE, draw_tile
 
 # Initialize Pygame
 pygame.init()
 
 # Constants
-CELL_SIZE = 60
 GRID_SIZE = 10
 WIDTH = CELL_SIZE * GRID_SIZE
 HEIGHT = CELL_SIZE * GRID_SIZE
@@ -26,37 +31,13 @@ GOLD = (255, 215, 0)
 PURPLE = (128, 0, 128)
 DARK_GRAY = (64, 64, 64)
 
+# Recorded rewards add the same death penalty as WumpusEnv
+DEATH_PENALTY = -1000
+
 # Game States
 MENU = "menu"
-PLAYING = "playing"
-WON = "won"
-LOST = "lost"
 INSTRUCTIONS = "instructions"
 
-# Load and scale images
-def load_image(name):
-    try:
-        path = os.path.join('assets', f'{name}.png')
-        image = pygame.image.load(path)
-        return pygame.transform.scale(image, (CELL_SIZE, CELL_SIZE))
-    except:
-        surface = pygame.Surface((CELL_SIZE, CELL_SIZE))
-        surface.fill(WHITE)
-        pygame.draw.rect(surface, BLACK, surface.get_rect(), 1)
-        print(f"Couldn't load image {name}, using fallback")
-        return surface
-
-# Game assets
-IMAGES = {
-    'empty': load_image('empty'),
-    'agent': load_image('agent'),
-    'wumpus': load_image('wumpus'),
-    'pit': load_image('pit'),
-    'gold': load_image('gold'),
-    'breeze': load_image('breeze'),
-    'stench': load_image('stench')
-}
-
 # Load sounds
 def load_sounds():
     pygame.mixer.init()
@@ -78,382 +59,440 @@ def load_sounds():
 
 SOUNDS = load_sounds()
 
+@lru_cache(maxsize=None)
+def get_font(size, bold=False):
+    return pygame.font.SysFont('arial', size, bold=bold)
+
+@lru_cache(maxsize=256)
+def render_text(text, size, color, bold=False):
+    return get_font(size, bold).render(text, True, color)
+
+MENU_BUTTONS = []
+for index, label in enumerate(['Play Game', 'Instructions', 'Quit']):
+    MENU_BUTTONS.append((label, render_text(label, 32, WHITE).get_rect(
+        center=(WIDTH//2, HEIGHT//2 + 60 * index))))
+
+@lru_cache(maxsize=None)
+def menu_background():
+    """Gradient, title and decorations of the menu, drawn once"""
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    surface.fill(BLACK)
+    
+    # Create gradient effect
+    gradient = pygame.Surface((WIDTH, 2))
+    gradient.fill(PURPLE)
+    for i in range(HEIGHT):
+        gradient.set_alpha(int(255 * (1 - i/HEIGHT)))
+        surface.blit(gradient, (0, i))
+
+    # Draw title with shadow effect
+    title_shadow = render_text('Hunt the Wumpus', 64, PURPLE, bold=True)
+    title = render_text('Hunt the Wumpus', 64, GOLD, bold=True)
+    surface.blit(title_shadow, title_shadow.get_rect(center=(WIDTH//2 + 4, HEIGHT//4 + 4)))
+    surface.blit(title, title.get_rect(center=(WIDTH//2, HEIGHT//4)))
+
+    # Draw decorative elements
+    pygame.draw.line(surface, GOLD, (WIDTH//4, HEIGHT//3), (3*WIDTH//4, HEIGHT//3), 2)
+    pygame.draw.line(surface, GOLD, (WIDTH//4, HEIGHT*2//3), (3*WIDTH//4, HEIGHT*2//3), 2)
+    return surface
+
+@lru_cache(maxsize=None)
+def instructions_background():
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    surface.fill(BLACK)
+    
+    # Draw title
+    title = render_text('How to Play', 48, GOLD)
+    surface.blit(title, title.get_rect(center=(WIDTH//2, 50)))
+
+    # Draw instructions
+    instructions = [
+        "Use WASD keys to move your character",
+        "Collect the gold (yellow) and return to start",
+        "Avoid the Wumpus (red) and pits (gray)",
+        "Feel a breeze near pits",
+        "Smell a stench near the Wumpus",
+        "Press SPACE to shoot an arrow",
+        "Press ESC to return to menu"
+    ]
+    
+    y = 150
+    for line in instructions:
+        text = render_text(line, 24, WHITE)
+        rect = text.get_rect(center=(WIDTH//2, y))
+        # Draw text shadow
+        surface.blit(render_text(line, 24, DARK_GRAY), rect.move(2, 2))
+        surface.blit(text, rect)
+        y += 50
+
+    # Draw decorative frame
+    pygame.draw.rect(surface, GOLD, (50, 100, WIDTH-100, HEIGHT-150), 2)
+    return surface
+
+@lru_cache(maxsize=None)
+def grid_layer():
+    """Empty board: unvisited black cells with their white borders"""
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    surface.fill(BLACK)
+    for i in range(GRID_SIZE):
+        for j in range(GRID_SIZE):
+            pygame.draw.rect(surface, WHITE, (j*CELL_SIZE, i*CELL_SIZE, CELL_SIZE, CELL_SIZE), 1)
+    return surface
+
+@lru_cache(maxsize=None)
+def game_over_overlay():
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    surface.set_alpha(128)
+    surface.fill(BLACK)
+    return surface
+
+def cell_key(world, i, j):
+    """Everything that decides how cell (i, j) looks"""
+    if not world.is_visited((i, j)):
+        return None
+    return (world.breeze_grid[i, j], world.stench_grid[i, j],
+            world.last_direction if [i, j] == world.player_pos else None,
+            world.wumpus_pos == [i, j], world.gold_grid[i, j], world.pit_grid[i, j])
+
+def cells_under(rect):
+    """Grid cells overlapping a screen rect"""
+    rows = range(max(0, rect.top // CELL_SIZE), min(GRID_SIZE, (rect.bottom - 1) // CELL_SIZE + 1))
+    cols = range(max(0, rect.left // CELL_SIZE), min(GRID_SIZE, (rect.right - 1) // CELL_SIZE + 1))
+    return [(i, j) for i in rows for j in cols]
+
+def draw_cell(screen, world, i, j):
+    """Repaint one grid cell from scratch and return its rect"""
+    cell_rect = pygame.Rect(j*CELL_SIZE, i*CELL_SIZE, CELL_SIZE, CELL_SIZE)
+    if not world.is_visited((i, j)):
+        screen.blit(grid_layer(), cell_rect, cell_rect)
+        return cell_rect
+
+    draw_tile(screen, cell_rect, world.breeze_grid[i, j], world.stench_grid[i, j],
+              world.last_direction if [i, j] == world.player_pos else None,
+              world.wumpus_pos == [i, j], world.gold_grid[i, j], world.pit_grid[i, j])
+    return cell_rect
+
 class Game:
-    def __init__(self):
-        self.reset_game()
+    def __init__(self, recorder=None):
+        self.world = WumpusWorld(GRID_SIZE)
         self.game_state = MENU
         self.message = None
-        self.message_timer = 0
-        self.last_direction = (0, 1)  # Default facing right
+        self.message_until = 0
+        self.recorder = recorder
+
+        # Render caches for the dirty-rectangle renderer
+        self.view = None
+        self.hover = None
+        self.cell_keys = {}
+        self.hud = []
+        self.signature = None
 
     def reset_game(self):
-        self.grid = [[' ' for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.player_pos = [GRID_SIZE-1, 0]
-        self.wumpus_pos = None
-        self.gold_pos = None
-        self.pits = []
-        self.score = 0  # Start from 0
+        if self.recorder is not None:
+            self.recorder.end_episode()
+        self.world.reset()
         self.game_state = PLAYING
-        self.has_gold = False
-        self.visited_cells = {(GRID_SIZE-1, 0)}
-        self.arrows = 1  # Start with 1 arrow
-        self.last_direction = (0, 1)
         self.message = None
-        self.message_timer = 0
-        self.initialize_game()
-
-    def initialize_game(self):
-        # Place Wumpus
-        self.wumpus_pos = [random.randint(0, GRID_SIZE-2), random.randint(0, GRID_SIZE-1)]
-        
-        # Place Gold
-        while True:
-            pos = [random.randint(0, GRID_SIZE-1), random.randint(0, GRID_SIZE-1)]
-            if pos != self.wumpus_pos and pos != self.player_pos:
-                self.gold_pos = pos
-                break
-        
-        # Place Pits
-        num_pits = GRID_SIZE
-        for _ in range(num_pits):
-            while True:
-                pos = [random.randint(0, GRID_SIZE-1), random.randint(0, GRID_SIZE-1)]
-                if (pos != self.wumpus_pos and pos != self.gold_pos and 
-                    pos != self.player_pos and pos not in self.pits):
-                    self.pits.append(pos)
-                    break
+        self.message_until = 0
 
     def shoot_arrow(self):
-        if self.arrows <= 0:
-            self.show_message("No arrows left!", 60)
-            return
-
-        # Get the target position based on player's facing direction
-        dx, dy = self.last_direction
-        target_x = self.player_pos[0] + dx
-        target_y = self.player_pos[1] + dy
-
-        # Check if we hit the wumpus
-        if [target_x, target_y] == self.wumpus_pos:
-            self.show_message("You killed the Wumpus! +2 arrows!", 60)
-            self.wumpus_pos = None  # Remove the wumpus
-            self.arrows += 2  # Get 2 more arrows for a successful hit
-            self.score += 200  # Better bonus for killing wumpus
-            if SOUNDS['death']:
-                SOUNDS['death'].play()
-        else:
-            self.show_message("Oh you missed!", 60)
-
-        self.arrows -= 1  # Use up one arrow
+        self.play_action(SHOOT, self.world.shoot_arrow)
 
     def show_message(self, text, duration):
+        """Show a message for `duration` milliseconds"""
         self.message = text
-        self.message_timer = duration
+        self.message_until = pygame.time.get_ticks() + duration
 
     def move_player(self, dx, dy):
         if self.game_state != PLAYING:
             return
+        self.play_action(ACTIONS.index((dx, dy)), lambda: self.world.move_player(dx, dy))
 
-        # Update facing direction if moving
-        if (dx, dy) != (0, 0):
-            self.last_direction = (dx, dy)
-
-        new_x = self.player_pos[0] + dx
-        new_y = self.player_pos[1] + dy
-        
-        if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE:
-            self.player_pos = [new_x, new_y]
-            if SOUNDS['move']:
-                SOUNDS['move'].play()
-            
-            self.visited_cells.add((new_x, new_y))
-            self.score += 5  # Points for exploring
-            
-            if self.has_gold:
-                self.score += 10  # Better bonus for moving with gold
-            
-            self.check_current_position()
-
-    def check_current_position(self):
-        pos = self.player_pos
-        
-        # Check for Wumpus or Pit (game over conditions)
-        if pos == self.wumpus_pos or pos in self.pits:
-            self.game_state = LOST
-            if SOUNDS['death']:
-                SOUNDS['death'].play()
-            # Auto-restart after 2 seconds
-            pygame.time.set_timer(pygame.USEREVENT + 1, 2000, loops=1)
+    def play_action(self, action, apply):
+        """Apply a world action, recording the transition if a recorder is attached"""
+        world = self.world
+        if self.recorder is None:
+            self.handle_events(apply())
             return
+        obs = world_observation(world, GRID_SIZE, GRID_SIZE)
+        score = world.score
+        events = apply()
+        reward = world.score - score + (DEATH_PENALTY if world.state == LOST else 0)
+        self.recorder.add(obs, action, reward, world_observation(world, GRID_SIZE, GRID_SIZE),
+                          world.state != PLAYING)
+        self.handle_events(events)
+
+    def handle_events(self, events):
+        """Play sounds, show messages and set timers for world events"""
+        for event in events:
+            if event == 'no_arrows':
+                self.show_message("No arrows left!", 1000)
+            elif event == 'miss':
+                self.show_message("Oh you missed!", 1000)
+            elif event == 'kill':
+                self.show_message("You killed the Wumpus! +2 arrows!", 1000)
+                self.play_sound('death')
+            elif event in ('death', 'win'):
+                self.game_state = self.world.state
+                self.play_sound(event)
+                # Auto-restart after 2 seconds
+                pygame.time.set_timer(pygame.USEREVENT + 1, 2000, loops=1)
+            else:
+                self.play_sound(event)
 
-        # Check for Gold
-        if pos == self.gold_pos and not self.has_gold:
-            self.has_gold = True
-            if SOUNDS['gold']:
-                SOUNDS['gold'].play()
-            self.score += 1000  # Better bonus for collecting gold
-        
-        # Check for Win (back at start with gold)
-        if self.has_gold and pos == [GRID_SIZE-1, 0]:
-            self.game_state = WON
-            if SOUNDS['win']:
-                SOUNDS['win'].play()
-            self.score += 2000  # Better bonus for winning
-            # Auto-restart after 2 seconds
-            pygame.time.set_timer(pygame.USEREVENT + 1, 2000, loops=1)
-
-    def is_adjacent_to_wumpus(self, pos):
-        x, y = pos
-        wx, wy = self.wumpus_pos
-        return abs(x - wx) + abs(y - wy) == 1
-
-    def is_adjacent_to_pit(self, pos):
-        x, y = pos
-        for pit_x, pit_y in self.pits:
-            if abs(x - pit_x) + abs(y - pit_y) == 1:
-                return True
-        return False
+    def play_sound(self, name):
+        if SOUNDS.get(name):
+            SOUNDS[name].play()
+
+    def invalidate(self):
+        """Force a full repaint on the next draw"""
+        self.view = None
 
     def draw(self, screen):
-        screen.fill(BLACK)
-        
+        """Draw the current view and return the list of screen rects that changed"""
+        self.tick_message()
         if self.game_state == MENU:
-            self.draw_menu(screen)
+            return self.draw_menu(screen)
         elif self.game_state == INSTRUCTIONS:
-            self.draw_instructions(screen)
+            return self.draw_instructions(screen)
         else:
-            self.draw_game(screen)
+            return self.draw_game(screen)
 
     def draw_menu(self, screen):
-        # Draw background
-        screen.fill(BLACK)
-        
-        # Create gradient effect
-        for i in range(HEIGHT):
-            alpha = int(255 * (1 - i/HEIGHT))
-            gradient = pygame.Surface((WIDTH, 2))
-            gradient.fill(PURPLE)
-            gradient.set_alpha(alpha)
-            screen.blit(gradient, (0, i))
-
-        # Draw title with shadow effect
-        font = pygame.font.SysFont('arial', 64, bold=True)
-        title_shadow = font.render('Hunt the Wumpus', True, PURPLE)
-        title = font.render('Hunt the Wumpus', True, GOLD)
-        
-        shadow_pos = title_shadow.get_rect(center=(WIDTH//2 + 4, HEIGHT//4 + 4))
-        title_pos = title.get_rect(center=(WIDTH//2, HEIGHT//4))
-        
-        screen.blit(title_shadow, shadow_pos)
-        screen.blit(title, title_pos)
-
-        # Draw menu options with hover effect
-        font = pygame.font.SysFont('arial', 32)
+        # Only the hover highlight changes, everything else is cached
         mouse_pos = pygame.mouse.get_pos()
-        
-        # Play button
-        play_text = font.render('Play Game', True, WHITE)
-        play_rect = play_text.get_rect(center=(WIDTH//2, HEIGHT//2))
-        if play_rect.collidepoint(mouse_pos):
-            pygame.draw.rect(screen, DARK_GRAY, play_rect.inflate(20, 10))
-            play_text = font.render('Play Game', True, GOLD)
-        screen.blit(play_text, play_rect)
-        
-        # Instructions button
-        inst_text = font.render('Instructions', True, WHITE)
-        inst_rect = inst_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 60))
-        if inst_rect.collidepoint(mouse_pos):
-            pygame.draw.rect(screen, DARK_GRAY, inst_rect.inflate(20, 10))
-            inst_text = font.render('Instructions', True, GOLD)
-        screen.blit(inst_text, inst_rect)
-        
-        # Quit button
-        quit_text = font.render('Quit', True, WHITE)
-        quit_rect = quit_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 120))
-        if quit_rect.collidepoint(mouse_pos):
-            pygame.draw.rect(screen, DARK_GRAY, quit_rect.inflate(20, 10))
-            quit_text = font.render('Quit', True, GOLD)
-        screen.blit(quit_text, quit_rect)
-
-        # Draw decorative elements
-        pygame.draw.line(screen, GOLD, (WIDTH//4, HEIGHT//3), (3*WIDTH//4, HEIGHT//3), 2)
-        pygame.draw.line(screen, GOLD, (WIDTH//4, HEIGHT*2//3), (3*WIDTH//4, HEIGHT*2//3), 2)
+        hover = tuple(rect.collidepoint(mouse_pos) for _, rect in MENU_BUTTONS)
+        if self.view == MENU and hover == self.hover:
+            return []
+        self.view = MENU
+        self.hover = hover
+
+        screen.blit(menu_background(), (0, 0))
+        for (label, rect), hovered in zip(MENU_BUTTONS, hover):
+            if hovered:
+                pygame.draw.rect(screen, DARK_GRAY, rect.inflate(20, 10))
+            screen.blit(render_text(label, 32, GOLD if hovered else WHITE), rect)
+        return [screen.get_rect()]
 
     def draw_instructions(self, screen):
-        screen.fill(BLACK)
-        
-        # Draw title
-        font = pygame.font.SysFont('arial', 48)
-        title = font.render('How to Play', True, GOLD)
-        screen.blit(title, title.get_rect(center=(WIDTH//2, 50)))
-
-        # Draw instructions
-        font = pygame.font.SysFont('arial', 24)
-        instructions = [
-            "Use WASD keys to move your character",
-            "Collect the gold (yellow) and return to start",
-            "Avoid the Wumpus (red) and pits (gray)",
-            "Feel a breeze near pits",
-            "Smell a stench near the Wumpus",
-            "Press SPACE to shoot an arrow",
-            "Press ESC to return to menu"
-        ]
-        
-        y = 150
-        for line in instructions:
-            text = font.render(line, True, WHITE)
-            rect = text.get_rect(center=(WIDTH//2, y))
-            # Draw text shadow
-            shadow = font.render(line, True, DARK_GRAY)
-            screen.blit(shadow, rect.move(2, 2))
-            screen.blit(text, rect)
-            y += 50
-
-        # Draw decorative frame
-        pygame.draw.rect(screen, GOLD, (50, 100, WIDTH-100, HEIGHT-150), 2)
+        if self.view == INSTRUCTIONS:
+            return []
+        self.view = INSTRUCTIONS
+        screen.blit(instructions_background(), (0, 0))
+        return [screen.get_rect()]
+
+    def tick_message(self):
+        if self.message and pygame.time.get_ticks() >= self.message_until:
+            self.message = None
+
+    def next_timeout(self):
+        """Milliseconds until the message expires, or None if nothing is pending"""
+        if self.message is None:
+            return None
+        return max(1, self.message_until - pygame.time.get_ticks())
+
+    def hud_items(self):
+        """(text, color, rect) for the score, arrow count and message"""
+        world = self.world
+        items = []
+        score = f'Score: {world.score}'
+        items.append((score, WHITE, render_text(score, 24, WHITE).get_rect(topleft=(10, HEIGHT - 30))))
+        arrows = f'Arrows: {world.arrows}'
+        items.append((arrows, WHITE, render_text(arrows, 24, WHITE).get_rect(topleft=(WIDTH - 120, HEIGHT - 30))))
+        if self.message:
+            message = render_text(self.message, 24, GOLD)
+            items.append((self.message, GOLD, message.get_rect(center=(WIDTH//2, 30))))
+        return items
 
     def draw_game(self, screen):
-        screen.fill(BLACK)
-        
-        # Draw grid and game elements
-        for i in range(GRID_SIZE):
-            for j in range(GRID_SIZE):
-                cell_rect = pygame.Rect(j*CELL_SIZE, i*CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                
-                if (i, j) in self.visited_cells:
-                    pygame.draw.rect(screen, DARK_GRAY, cell_rect)
-                    
-                    # Draw breeze
-                    if self.is_adjacent_to_pit((i, j)):
-                        screen.blit(IMAGES['breeze'], (j*CELL_SIZE, i*CELL_SIZE))
-                    
-                    # Draw stench
-                    if self.wumpus_pos and self.is_adjacent_to_wumpus((i, j)):
-                        screen.blit(IMAGES['stench'], (j*CELL_SIZE, i*CELL_SIZE))
-                    
-                    # Draw entities
-                    if [i, j] == self.player_pos:
-                        # Rotate player image based on facing direction
-                        angle = 0
-                        if self.last_direction == (-1, 0):  # Up
-                            angle = 90
-                        elif self.last_direction == (1, 0):  # Down
-                            angle = -90
-                        elif self.last_direction == (0, -1):  # Left
-                            angle = 180
-                        rotated_player = pygame.transform.rotate(IMAGES['agent'], angle)
-                        screen.blit(rotated_player, (j*CELL_SIZE, i*CELL_SIZE))
-                    if self.wumpus_pos and [i, j] == self.wumpus_pos:
-                        screen.blit(IMAGES['wumpus'], (j*CELL_SIZE, i*CELL_SIZE))
-                    if [i, j] == self.gold_pos:
-                        screen.blit(IMAGES['gold'], (j*CELL_SIZE, i*CELL_SIZE))
-                    if [i, j] in self.pits:
-                        screen.blit(IMAGES['pit'], (j*CELL_SIZE, i*CELL_SIZE))
-                
-                pygame.draw.rect(screen, WHITE, cell_rect, 1)
-        
-        # Draw score and arrows
-        font = pygame.font.SysFont('arial', 24)
-        score_text = font.render(f'Score: {self.score}', True, WHITE)
-        screen.blit(score_text, (10, HEIGHT - 30))
-
-        # Draw arrow count
-        arrow_text = font.render(f'Arrows: {self.arrows}', True, WHITE)
-        screen.blit(arrow_text, (WIDTH - 120, HEIGHT - 30))
-
-        # Draw message if exists
-        if self.message and self.message_timer > 0:
-            message_text = font.render(self.message, True, GOLD)
-            screen.blit(message_text, message_text.get_rect(center=(WIDTH//2, 30)))
-            self.message_timer -= 1
-            if self.message_timer <= 0:
-                self.message = None
+        world = self.world
+        full = self.view != self.game_state
+        if not full and self.game_state in [WON, LOST]:
+            # The game over screen is static until the restart or a HUD change
+            if self.hud_items() == self.hud:
+                return []
+            full = True
+
+        if full:
+            screen.blit(grid_layer(), (0, 0))
+            self.cell_keys = {}
+            self.hud = []
+            self.signature = None
+        self.view = self.game_state
+
+        # Find the cells whose contents changed since the last frame
+        dirty = set()
+        signature = (id(world.pit_grid), world.visited_bits, world.stench_bits,
+                     tuple(world.player_pos), world.last_direction, world.wumpus_pos)
+        if signature != self.signature:
+            self.signature = signature
+            for i in range(GRID_SIZE):
+                for j in range(GRID_SIZE):
+                    key = cell_key(world, i, j)
+                    if self.cell_keys.get((i, j)) != key:
+                        self.cell_keys[i, j] = key
+                        dirty.add((i, j))
+
+        # Cells under HUD text that changed (or went away) need repainting too
+        hud = self.hud_items()
+        if hud != self.hud:
+            for _, _, rect in self.hud + hud:
+                dirty.update(cells_under(rect))
+        self.hud = hud
+
+        rects = []
+        for i, j in sorted(dirty):
+            rects.append(draw_cell(screen, world, i, j))
+        # Re-blit HUD text only inside the repainted cells so it is never drawn twice
+        for text, color, rect in hud:
+            for cell_rect in rects:
+                overlap = cell_rect.clip(rect)
+                if overlap:
+                    screen.blit(render_text(text, 24, color), overlap,
+                                overlap.move(-rect.x, -rect.y))
 
         # Draw game over message
         if self.game_state in [WON, LOST]:
-            s = pygame.Surface((WIDTH, HEIGHT))
-            s.set_alpha(128)
-            s.fill(BLACK)
-            screen.blit(s, (0, 0))
-            
-            font = pygame.font.SysFont('arial', 48)
+            screen.blit(game_over_overlay(), (0, 0))
             if self.game_state == WON:
-                msg = 'You Won!'
-                color = GOLD
+                text = render_text('You Won!', 48, GOLD)
             else:
-                msg = 'Game Over'
-                color = RED
-            text = font.render(msg, True, color)
+                text = render_text('Game Over', 48, RED)
             screen.blit(text, text.get_rect(center=(WIDTH//2, HEIGHT//2)))
-            
-            font = pygame.font.SysFont('arial', 24)
-            restart = font.render('Restarting...', True, WHITE)
+            restart = render_text('Restarting...', 24, WHITE)
             screen.blit(restart, restart.get_rect(center=(WIDTH//2, HEIGHT//2 + 50)))
+            return [screen.get_rect()]
+        return [screen.get_rect()] if full else rects
 
-def main():
-    game = Game()
-    clock = pygame.time.Clock()
+def handle_input(game, event):
+    """Apply one pygame event to the game; returns False when the game should quit"""
+    if event.type == pygame.QUIT:
+        return False
 
+    elif event.type == pygame.MOUSEBUTTONDOWN:
+        if event.button == 1:  # Left click
+            if game.game_state == MENU:
+                mouse_pos = pygame.mouse.get_pos()
+                play_rect = pygame.Rect(WIDTH//2 - 50, HEIGHT//2 - 20, 100, 40)
+                if play_rect.collidepoint(mouse_pos):
+                    game.reset_game()
+                inst_rect = pygame.Rect(WIDTH//2 - 50, HEIGHT//2 + 40, 100, 40)
+                if inst_rect.collidepoint(mouse_pos):
+                    game.game_state = INSTRUCTIONS
+                quit_rect = pygame.Rect(WIDTH//2 - 50, HEIGHT//2 + 100, 100, 40)
+                if quit_rect.collidepoint(mouse_pos):
+                    return False
+
+    elif event.type == pygame.KEYDOWN:
+        if game.game_state == MENU:
+            if event.key == pygame.K_SPACE:
+                game.reset_game()
+            elif event.key == pygame.K_i:
+                game.game_state = INSTRUCTIONS
+            elif event.key == pygame.K_ESCAPE:
+                return False
+
+        elif game.game_state == INSTRUCTIONS:
+            if event.key == pygame.K_ESCAPE:
+                game.game_state = MENU
+
+        elif game.game_state == PLAYING:
+            if event.key in [pygame.K_UP, pygame.K_w]:
+                game.move_player(-1, 0)
+            elif event.key in [pygame.K_DOWN, pygame.K_s]:
+                game.move_player(1, 0)
+            elif event.key in [pygame.K_LEFT, pygame.K_a]:
+                game.move_player(0, -1)
+            elif event.key in [pygame.K_RIGHT, pygame.K_d]:
+                game.move_player(0, 1)
+            elif event.key == pygame.K_SPACE:
+                game.shoot_arrow()
+            elif event.key == pygame.K_ESCAPE:
+                game.game_state = MENU
+
+        elif game.game_state in [WON, LOST]:
+            if event.key == pygame.K_SPACE:
+                game.game_state = MENU
+            elif event.key == pygame.K_ESCAPE:
+                return False
+
+    elif event.type == pygame.USEREVENT + 1:  # Auto-restart timer
+        game.game_state = MENU
+        game.reset_game()
+
+    elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+        # Window contents were lost, repaint everything
+        game.invalidate()
+    return True
+
+class FrameStats:
+    """Counts loop iterations that repainted something vs. ones that had nothing to draw"""
+
+    def __init__(self):
+        self.rendered = 0
+        self.skipped = 0
+
+    def present(self, rects):
+        if rects:
+            pygame.display.update(rects)
+            self.rendered += 1
+        else:
+            self.skipped += 1
+
+    def __str__(self):
+        total = self.rendered + self.skipped
+        return (f"{self.rendered} frames rendered, {self.skipped} skipped "
+                f"({self.skipped / max(1, total):.1%} skipped)")
+
+def run_fixed_fps(game, stats, fps=60):
+    """Poll events and redraw at a fixed frame rate"""
+    clock = pygame.time.Clock()
     running = True
     while running:
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:  # Left click
-                    if game.game_state == MENU:
-                        mouse_pos = pygame.mouse.get_pos()
-                        play_rect = pygame.Rect(WIDTH//2 - 50, HEIGHT//2 - 20, 100, 40)
-                        if play_rect.collidepoint(mouse_pos):
-                            game.reset_game()
-                        inst_rect = pygame.Rect(WIDTH//2 - 50, HEIGHT//2 + 40, 100, 40)
-                        if inst_rect.collidepoint(mouse_pos):
-                            game.game_state = INSTRUCTIONS
-                        quit_rect = pygame.Rect(WIDTH//2 - 50, HEIGHT//2 + 100, 100, 40)
-                        if quit_rect.collidepoint(mouse_pos):
-                            running = False
-            
-            elif event.type == pygame.KEYDOWN:
-                if game.game_state == MENU:
-                    if event.key == pygame.K_SPACE:
-                        game.reset_game()
-                    elif event.key == pygame.K_i:
-                        game.game_state = INSTRUCTIONS
-                    elif event.key == pygame.K_ESCAPE:
-                        running = False
-                
-                elif game.game_state == INSTRUCTIONS:
-                    if event.key == pygame.K_ESCAPE:
-                        game.game_state = MENU
-                
-                elif game.game_state == PLAYING:
-                    if event.key in [pygame.K_UP, pygame.K_w]:
-                        game.move_player(-1, 0)
-                    elif event.key in [pygame.K_DOWN, pygame.K_s]:
-                        game.move_player(1, 0)
-                    elif event.key in [pygame.K_LEFT, pygame.K_a]:
-                        game.move_player(0, -1)
-                    elif event.key in [pygame.K_RIGHT, pygame.K_d]:
-                        game.move_player(0, 1)
-                    elif event.key == pygame.K_SPACE:
-                        game.shoot_arrow()
-                    elif event.key == pygame.K_ESCAPE:
-                        game.game_state = MENU
-                
-                elif game.game_state in [WON, LOST]:
-                    if event.key == pygame.K_SPACE:
-                        game.game_state = MENU
-                    elif event.key == pygame.K_ESCAPE:
-                        running = False
-            
-            elif event.type == pygame.USEREVENT + 1:  # Auto-restart timer
-                game.game_state = MENU
-                game.reset_game()
-        
-        game.draw(SCREEN)
-        pygame.display.flip()
-        clock.tick(60)
+            running = handle_input(game, event) and running
+        stats.present(game.draw(SCREEN))
+        clock.tick(fps)
+
+def run_event_driven(game, stats):
+    """Sleep in pygame.event.wait until input or a timer needs a repaint.
+
+    The wait times out when the on-screen message expires; the auto-restart
+    timer and mouse motion (menu hover) arrive as events. Every wake-up
+    draws once, and draw() itself returns no rects when nothing changed.
+    """
+    running = True
+    stats.present(game.draw(SCREEN))
+    while running:
+        timeout = game.next_timeout()
+        event = pygame.event.wait(timeout) if timeout else pygame.event.wait()
+        for event in [event] + pygame.event.get():
+            if event.type != pygame.NOEVENT:
+                running = handle_input(game, event) and running
+        stats.present(game.draw(SCREEN))
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Hunt the Wumpus")
+    parser.add_argument('--event-driven', action='store_true',
+                        help="only wake up and repaint on input or timers instead of polling at 60 FPS")
+    parser.add_argument('--frame-stats', action='store_true',
+                        help="print how many frames were rendered vs. skipped on exit")
+    parser.add_argument('--record', metavar='DIR',
+                        help="record every move as trajectory shards in DIR (see env/trajectory.py)")
+    args = parser.parse_args()
+
+    recorder = TrajectoryWriter(args.record) if args.record else None
+    game = Game(recorder)
+    stats = FrameStats()
+    if args.event_driven:
+        run_event_driven(game, stats)
+    else:
+        run_fixed_fps(game, stats)
+    if args.frame_stats:
+        print(stats)
+    if recorder is not None:
+        recorder.close()
+        print(f"Recorded {recorder.total_rows} transitions to {args.record}")
 
     pygame.quit()
     sys.exit()
@@ -6,13 +6,29 @@ import seaborn as sns
 from datetime import datetime
 from stable_baselines3 import PPO, A2C, DQN
 from stable_baselines3.common.evaluation import evaluate_policy
+from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
 from env.wumpus_env import WumpusEnv
-from agents.dqn_agent import DQNAgent
+from env.sb3_vec_env import WumpusSB3VecEnv
+from env.world_suite import WorldSuite
+from env.trajectory import TrajectoryWriter
+from evaluate import evaluate_policy_batched, print_summary
+from agents.dqn_agent import DQNAgent, NETWORK_BACKENDS, configure_threads
+from agents.distributed import train_actor_learner
+from agents.oracle import prefill_memory
+from agents.profiling import NULL_TIMER, TrainingTimings, profile
 from tqdm import tqdm
 import json
+import argparse
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 print("All imports successful!")
 
+# Below this many envs SB3 collects faster from DummyVecEnv than from the batched adapter
+BATCHED_MIN_ENVS = 16
+
 def create_output_dirs():
     """Create necessary directories for saving models and results"""
     print("Creating output directories...")
@@ -21,57 +37,136 @@ def create_output_dirs():
         os.makedirs(dir_name, exist_ok=True)
     print("Directories created successfully!")
 
-def train_custom_dqn(env, episodes=100, evaluate_every=20):
-    """Train the custom DQN agent"""
+def train_custom_dqn(env, episodes=100, evaluate_every=20, prioritized_replay=False,
+                     train_freq=1, gradient_steps=1, learning_starts=64,
+                     target_update_interval=500, model_dir='models', n_eval_episodes=1000,
+                     demo_episodes=0, demo_solver='oracle', recorder=None, timings_path=None,
+                     profiler=None, compact_replay=False, network_backend='eager',
+                     fused_optimizer=False):
+    """Train the custom DQN agent
+
+    Every `train_freq` env steps (after `learning_starts` warm-up steps) the
+    agent runs `gradient_steps` replay updates. The defaults update on every
+    step once a batch is collected, as short runs (the default 100 episodes
+    are only ~2000 steps) need every update; for long runs a larger warm-up
+    and train_freq=4 trade updates per step for throughput. The target network is synced
+    every `target_update_interval` env steps and epsilon decays per episode.
+    Every `evaluate_every` episodes the greedy policy is evaluated on
+    `n_eval_episodes` batched episodes at the current grid size. With
+    `demo_episodes` the replay memory starts pre-filled with won episodes
+    of the oracle (or 'inference') solver from agents.oracle. Every
+    training transition is appended to `recorder` (a TrajectoryWriter) if
+    one is given.
+
+    With `timings_path` every phase of the loop (env step, act, replay
+    sample/forward/backward/optimizer, evaluation, checkpoints...) is timed
+    and one JSON line per episode is appended to that file (see
+    agents.profiling). `profiler` ('cprofile' or 'torch') additionally runs
+    the loop under that profiler and saves its output in `model_dir`.
+    Both are off by default and then cost nothing.
+
+    `compact_replay` stores replay states as int8 columns and packed bits
+    (agents.replay_buffer.CompactReplayBuffer) instead of float32 rows.
+    `network_backend` ('script' or 'compile') runs the networks through
+    TorchScript or torch.compile (see agents.dqn_agent.optimize_network)
+    and `fused_optimizer` uses a single-kernel Adam step where supported.
+    """
     print("Training custom DQN...")
-    # Calculate state dimension based on flattened observation space
-    state_dim = (
-        1 +  # grid_size
-        2 +  # player_pos
-        env.max_entities * 2 +  # wumpus_positions
-        env.max_entities * 2 +  # pit_positions
-        2 +  # gold_position
-        1 +  # has_gold
-        env.max_grid_size * env.max_grid_size  # visited_cells
-    )
-    
-    agent = DQNAgent(state_dim=state_dim, action_dim=env.action_space.n)
+    # State layout comes from the observation space
+    agent = DQNAgent(state_dim=None, action_dim=env.action_space.n,
+                     prioritized_replay=prioritized_replay,
+                     observation_space=env.observation_space, compact_replay=compact_replay,
+                     network_backend=network_backend, fused_optimizer=fused_optimizer)
+    if demo_episodes:
+        added = prefill_memory(agent, env, demo_episodes, demo_solver)
+        print(f"Pre-filled replay memory with {added} {demo_solver} demonstration transitions")
     episode_rewards = []
     evaluation_scores = []
+    total_steps = 0
+    # Two preallocated state vectors, swapped every step
+    state_buffers = np.empty((2, agent.state_dim), dtype=np.float32)
+    timings = TrainingTimings(timings_path) if timings_path else None
+    timer = agent.timer = timings.timer if timings else NULL_TIMER
+    profile_path = os.path.join(model_dir, 'custom_dqn_profile' +
+                                ('.json' if profiler == 'torch' else '.prof'))
     
     try:
-        for episode in range(episodes):
-            state, _ = env.reset()
-            state = agent.preprocess_state(state)
-            episode_reward = 0
-            done = False
-            steps = 0
-            
-            while not done and steps < 200:
-                action = agent.act(state)
-                next_state, reward, terminated, truncated, _ = env.step(action)
-                done = terminated or truncated
-                next_state = agent.preprocess_state(next_state)
+        with profile(profiler, profile_path):
+            for episode in range(episodes):
+                with timer.phase('env_reset'):
+                    obs, _ = env.reset()
+                with timer.phase('preprocess'):
+                    state = agent.preprocess_state(obs, out=state_buffers[0])
+                next_state = state_buffers[1]
+                episode_reward = 0
+                done = False
+                steps = 0
                 
-                agent.remember(state, action, reward, next_state, done)
-                agent.replay()
+                while not done and steps < 200:
+                    with timer.phase('act'):
+                        action = agent.act(state)
+                    with timer.phase('env_step'):
+                        next_obs, reward, terminated, truncated, _ = env.step(action)
+                    done = terminated or truncated
+                    with timer.phase('preprocess'):
+                        agent.preprocess_state(next_obs, out=next_state)
+                    if recorder is not None:
+                        with timer.phase('record'):
+                            recorder.add(obs, action, reward, next_obs, terminated, truncated,
+                                         world=env.world_index)
+                    
+                    with timer.phase('remember'):
+                        agent.remember(state, action, reward, next_state, done)
+                    total_steps += 1
+                    if total_steps >= learning_starts and total_steps % train_freq == 0:
+                        with timer.phase('replay'):
+                            for _ in range(gradient_steps):
+                                agent.replay()
+                    if total_steps % target_update_interval == 0:
+                        with timer.phase('target_sync'):
+                            agent.update_target_network()
+                    
+                    state, next_state = next_state, state
+                    obs = next_obs
+                    episode_reward += reward
+                    steps += 1
                 
-                state = next_state
-                episode_reward += reward
-                steps += 1
-            
-            episode_rewards.append(episode_reward)
-            print(f"Episode {episode + 1}/{episodes}, Reward: {episode_reward:.2f}")
-            
-            # Save model periodically
-            if (episode + 1) % 20 == 0:
-                agent.save(f"models/custom_dqn_episode_{episode + 1}.pth")
+                agent.decay_epsilon()
+                episode_rewards.append(episode_reward)
+                print(f"Episode {episode + 1}/{episodes}, Reward: {episode_reward:.2f}")
+                
+                if (episode + 1) % evaluate_every == 0:
+                    with timer.phase('evaluate'):
+                        eval_results = evaluate_policy_batched(agent, n_eval_episodes,
+                                                               grid_size=env.grid_size,
+                                                               seed=episode, suite=env.suite)
+                    print_summary(f"Evaluation after episode {episode + 1}", eval_results)
+                    evaluation_scores.append({
+                        'episode': episode + 1,
+                        'grid_size': env.grid_size,
+                        'mean_reward': eval_results['mean_reward'],
+                        'win_rate': eval_results['win_rate'],
+                    })
+                
+                # Save model periodically
+                if (episode + 1) % 20 == 0:
+                    with timer.phase('checkpoint'):
+                        agent.save(os.path.join(model_dir, f"custom_dqn_episode_{episode + 1}.pth"))
+                
+                if timings:
+                    timings.end_episode(episode + 1, steps, episode_reward, agent,
+                                        grid_size=env.grid_size, epsilon=agent.epsilon)
         
     except Exception as e:
         print(f"Error during training: {str(e)}")
     
+    if timings:
+        timings.summary()
+        timings.close()
+        print(f"Per-episode timings saved to {timings_path}")
+    
     # Save final model
-    agent.save("models/custom_dqn_final.pth")
+    agent.save(os.path.join(model_dir, "custom_dqn_final.pth"))
     print("Custom DQN training complete!")
     
     # Return results dictionary
@@ -82,79 +177,119 @@ def train_custom_dqn(env, episodes=100, evaluate_every=20):
         'std_reward': np.std(episode_rewards[-20:])  # Std of last 20 episodes
     }
 
-def train_stable_baselines(env, algo_name, total_timesteps=10000):
-    """Train using Stable-Baselines3 algorithms"""
-    print(f"\nTraining {algo_name}...")
+def train_custom_dqn_parallel(num_actors=4, envs_per_actor=16, total_steps=200000,
+                              model_dir='models', seed=0, suite=None, compact_replay=False,
+                              network_backend='eager', fused_optimizer=False,
+                              prioritized_replay=False):
+    """Train the custom DQN with parallel actor processes feeding one learner
+
+    See agents.distributed.train_actor_learner; the model is saved as
+    custom_dqn_parallel_final.pth in `model_dir`.
+    """
+    print(f"Training custom DQN with {num_actors} actors...")
+    agent, results = train_actor_learner(num_actors=num_actors, envs_per_actor=envs_per_actor,
+                                         total_steps=total_steps, seed=seed,
+                                         env_kwargs={'suite': suite} if suite else None,
+                                         agent_kwargs={'prioritized_replay': prioritized_replay,
+                                                       'compact_replay': compact_replay,
+                                                       'network_backend': network_backend,
+                                                       'fused_optimizer': fused_optimizer})
+    agent.save(os.path.join(model_dir, 'custom_dqn_parallel_final.pth'))
+    print(f"Collected {results['env_steps']} steps at "
+          f"{results['env_steps_per_second']:.0f} steps/s, {results['updates']} updates")
+    print("Parallel custom DQN training complete!")
+    return results
+
+def resolve_vec_backend(vec_backend, n_envs):
+    """'auto' is 'batched' from BATCHED_MIN_ENVS envs on and 'dummy' below"""
+    if vec_backend == 'auto':
+        return 'batched' if n_envs >= BATCHED_MIN_ENVS else 'dummy'
+    return vec_backend
+
+def make_training_vec_env(n_envs=1, vec_backend='auto', seed=None, suite=None):
+    """Build the vectorized training env for SB3
+
+    'dummy' steps Monitor-wrapped WumpusEnv copies in-process, 'subprocess'
+    runs each in its own worker process and 'batched' uses the NumPy
+    WumpusVectorEnv through WumpusSB3VecEnv ('auto' picks one of dummy and
+    batched by n_envs). A WorldSuite is shared by every env (subprocess
+    workers reopen the same memory-mapped files).
+    """
+    vec_backend = resolve_vec_backend(vec_backend, n_envs)
+    if vec_backend == 'batched':
+        return WumpusSB3VecEnv(n_envs, seed=seed, suite=suite)
+    if vec_backend == 'subprocess':
+        vec_env_cls = SubprocVecEnv
+    elif vec_backend == 'dummy':
+        vec_env_cls = DummyVecEnv
+    else:
+        raise ValueError(f"Unknown vec env backend: {vec_backend}")
+    return make_vec_env(WumpusEnv, n_envs=n_envs, seed=seed, vec_env_cls=vec_env_cls,
+                        env_kwargs={'suite': suite})
+
+def train_stable_baselines(env, algo_name, total_timesteps=10000, model_dir='models', seed=None,
+                           n_envs=1, vec_backend='auto', n_eval_episodes=1000, recorder=None):
+    """Train using Stable-Baselines3 algorithms
+
+    Training collects from `n_envs` parallel envs (see make_training_vec_env);
+    `env` is used for the evaluation episodes, which are appended to
+    `recorder` (a TrajectoryWriter) if one is given.
+    """
+    vec_backend = resolve_vec_backend(vec_backend, n_envs)
+    print(f"\nTraining {algo_name} on {n_envs} {vec_backend} envs...")
     
-    # Custom callback to track episode rewards
+    # Custom callback to track episode rewards across every sub-env
     class RewardCallback:
         def __init__(self):
             self.rewards = []
-            self._current_reward = 0
         
         def __call__(self, locals_, globals_):
-            # Get info from the locals dictionary
-            info = locals_['infos'][0] if locals_['infos'] else None
-            done = locals_['dones'][0]
-            
-            if info and 'episode' in info:
-                episode_reward = info['episode']['r']
-                self.rewards.append(episode_reward)
-                print(f"Episode {len(self.rewards)}, Reward: {episode_reward:.2f}")
+            for info, done in zip(locals_['infos'], locals_['dones']):
+                if done and 'episode' in info:
+                    episode_reward = float(info['episode']['r'])
+                    self.rewards.append(episode_reward)
+                    print(f"Episode {len(self.rewards)}, Reward: {episode_reward:.2f}")
             
             return True
     
     reward_callback = RewardCallback()
+    train_env = make_training_vec_env(n_envs, vec_backend, seed, env.suite)
     
     if algo_name == "PPO":
-        model = PPO("MultiInputPolicy", env, verbose=0)
+        model = PPO("MultiInputPolicy", train_env, verbose=0, seed=seed)
     elif algo_name == "A2C":
-        model = A2C("MultiInputPolicy", env, verbose=0)
+        model = A2C("MultiInputPolicy", train_env, verbose=0, seed=seed)
     elif algo_name == "DQN":
-        model = DQN("MultiInputPolicy", env, verbose=0)
+        model = DQN("MultiInputPolicy", train_env, verbose=0, seed=seed)
     else:
         raise ValueError(f"Unknown algorithm: {algo_name}")
     
     # Train the model
     model.learn(total_timesteps=total_timesteps, callback=reward_callback)
     episode_rewards = reward_callback.rewards
+    train_env.close()
     
     # Save the model
-    model.save(f"models/{algo_name.lower()}_final")
+    model.save(os.path.join(model_dir, f"{algo_name.lower()}_final"))
     
     # Evaluate the model
     print(f"\nEvaluating {algo_name}...")
-    eval_rewards = []
-    n_eval_episodes = 10
-    
-    for episode in range(n_eval_episodes):
-        obs, _ = env.reset()
-        episode_reward = 0
-        done = False
-        steps = 0
-        
-        while not done and steps < 200:
-            action, _ = model.predict(obs, deterministic=True)
-            obs, reward, terminated, truncated, _ = env.step(action)
-            done = terminated or truncated
-            episode_reward += reward
-            steps += 1
-        
-        eval_rewards.append(episode_reward)
-        print(f"Evaluation episode {episode + 1}: Reward = {episode_reward:.2f}")
-    
-    mean_reward = np.mean(eval_rewards)
-    std_reward = np.std(eval_rewards)
+    eval_results = evaluate_policy_batched(model, n_eval_episodes, grid_size=env.grid_size,
+                                           seed=seed or 0, suite=env.suite, recorder=recorder)
+    eval_rewards = eval_results['rewards']
+    mean_reward = eval_results['mean_reward']
+    std_reward = eval_results['std_reward']
     
     print(f"{algo_name} evaluation complete!")
-    print(f"Mean reward: {mean_reward:.2f} +/- {std_reward:.2f}")
+    print_summary(algo_name, eval_results)
     
     # Return results dictionary
     return {
         'episode_rewards': episode_rewards,
         'eval_rewards': eval_rewards,
         'mean_reward': mean_reward,
-        'std_reward': std_reward
+        'std_reward': std_reward,
+        'win_rate': eval_results['win_rate'],
     }
 
 def plot_training_results(custom_results, sb_results, save_dir='plots'):
@@ -192,31 +327,206 @@ def plot_training_results(custom_results, sb_results, save_dir='plots'):
 
     print("Plotting complete!")
 
-def main():
-    print("Starting Wumpus World RL Training\n")
-    create_output_dirs()
+# Result keys and trainers for every algorithm in the comparison
+ALGORITHMS = {
+    'custom_dqn': None,
+    'sb3_ppo': 'PPO',
+    'sb3_a2c': 'A2C',
+    'sb3_dqn': 'DQN',
+}
+
+def run_training_job(key, seed, num_threads, n_envs=1, vec_backend='auto', suite_path=None,
+                     demo_episodes=0, record_dir=None, timings=False, profiler=None,
+                     compact_replay=False, network_backend='eager', num_actors=0,
+                     actor_steps=200000, fused_optimizer=False, prioritized_replay=False):
+    """Train one algorithm/seed in isolation (process pool worker)
+
+    Each job gets its own env, a bounded torch thread count (and a single
+    inter-op thread) and its own models/<key>/seed_<seed> and
+    results/<key>/seed_<seed>.json paths. With `num_actors` the custom DQN
+    is trained by that many actor processes feeding one learner for
+    `actor_steps` env steps instead of the single-process loop.
+    """
+    configure_threads(num_threads, 1)
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    
+    model_dir = os.path.join('models', key, f'seed_{seed}')
+    results_dir = os.path.join('results', key)
+    os.makedirs(model_dir, exist_ok=True)
+    os.makedirs(results_dir, exist_ok=True)
     
+    env = WumpusEnv(suite=WorldSuite(suite_path) if suite_path else None)
+    env.reset(seed=seed)
+    recorder = None
+    if record_dir:
+        recorder = TrajectoryWriter(os.path.join(record_dir, key, f'seed_{seed}'))
+    if ALGORITHMS[key] is None and num_actors:
+        results = train_custom_dqn_parallel(num_actors, total_steps=actor_steps, model_dir=model_dir,
+                                            seed=seed, suite=env.suite, compact_replay=compact_replay,
+                                            network_backend=network_backend,
+                                            fused_optimizer=fused_optimizer,
+                                            prioritized_replay=prioritized_replay)
+    elif ALGORITHMS[key] is None:
+        timings_path = os.path.join(results_dir, f'seed_{seed}_timings.jsonl') if timings else None
+        results = train_custom_dqn(env, model_dir=model_dir, demo_episodes=demo_episodes,
+                                   recorder=recorder, timings_path=timings_path, profiler=profiler,
+                                   compact_replay=compact_replay, network_backend=network_backend,
+                                   fused_optimizer=fused_optimizer,
+                                   prioritized_replay=prioritized_replay)
+    else:
+        results = train_stable_baselines(env, ALGORITHMS[key], model_dir=model_dir, seed=seed,
+                                         n_envs=n_envs, vec_backend=vec_backend, recorder=recorder)
+    if recorder is not None:
+        recorder.close()
+    
+    with open(os.path.join(results_dir, f'seed_{seed}.json'), 'w') as f:
+        json.dump(results, f, indent=4, default=float)
+    return key, seed, results
+
+def run_parallel(seeds=(0,), workers=None, threads_per_job=None, n_envs=1, vec_backend='auto',
+                 suite_path=None, demo_episodes=0, record_dir=None, timings=False, profiler=None,
+                 compact_replay=False, network_backend='eager', num_actors=0, actor_steps=200000,
+                 fused_optimizer=False, prioritized_replay=False):
+    """Run every algorithm and seed as a separate job in a process pool"""
+    jobs = [(key, seed) for key in ALGORITHMS for seed in seeds]
+    workers = workers or min(len(jobs), os.cpu_count())
+    threads_per_job = threads_per_job or max(1, os.cpu_count() // workers)
+    print(f"Running {len(jobs)} training jobs on {workers} workers "
+          f"({threads_per_job} torch threads each)")
+    
+    all_results = {}
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(run_training_job, key, seed, threads_per_job, n_envs, vec_backend,
+                               suite_path, demo_episodes, record_dir, timings, profiler,
+                               compact_replay, network_backend, num_actors, actor_steps,
+                               fused_optimizer, prioritized_replay)
+                   for key, seed in jobs]
+        for future in as_completed(futures):
+            key, seed, results = future.result()
+            print(f"Finished {key} (seed {seed}): mean reward {results['mean_reward']:.2f}")
+            name = key if len(seeds) == 1 else f'{key}_seed_{seed}'
+            all_results[name] = results
+    
+    # Keep the same algorithm order as the sequential run
+    order = [key if len(seeds) == 1 else f'{key}_seed_{seed}' for key, seed in jobs]
+    return {name: all_results[name] for name in order}
+
+def run_sequential(n_envs=1, vec_backend='auto', suite_path=None, demo_episodes=0,
+                   record_dir=None, timings=False, profiler=None, compact_replay=False,
+                   network_backend='eager', num_actors=0, actor_steps=200000, fused_optimizer=False,
+                   prioritized_replay=False):
     # Initialize environment
-    env = WumpusEnv()
+    env = WumpusEnv(suite=WorldSuite(suite_path) if suite_path else None)
     
     # Dictionary to store all results
     all_results = {}
     
     # Train Custom DQN
-    custom_results = train_custom_dqn(env)
+    recorder = TrajectoryWriter(os.path.join(record_dir, 'custom_dqn')) if record_dir else None
+    timings_path = 'results/custom_dqn_timings.jsonl' if timings else None
+    if num_actors:
+        custom_results = train_custom_dqn_parallel(num_actors, total_steps=actor_steps,
+                                                   suite=env.suite, compact_replay=compact_replay,
+                                                   network_backend=network_backend,
+                                                   fused_optimizer=fused_optimizer,
+                                                   prioritized_replay=prioritized_replay)
+    else:
+        custom_results = train_custom_dqn(env, demo_episodes=demo_episodes, recorder=recorder,
+                                          timings_path=timings_path, profiler=profiler,
+                                          compact_replay=compact_replay,
+                                          network_backend=network_backend,
+                                          fused_optimizer=fused_optimizer,
+                                          prioritized_replay=prioritized_replay)
     all_results['custom_dqn'] = custom_results
     
     # Train Stable-Baselines3 algorithms
     algorithms = ["PPO", "A2C", "DQN"]
     for algo in algorithms:
-        results = train_stable_baselines(env, algo)
+        if record_dir:
+            recorder.close()
+            recorder = TrajectoryWriter(os.path.join(record_dir, f'sb3_{algo.lower()}'))
+        results = train_stable_baselines(env, algo, n_envs=n_envs, vec_backend=vec_backend,
+                                         recorder=recorder)
         all_results[f'sb3_{algo.lower()}'] = results
+    if recorder is not None:
+        recorder.close()
+    return all_results
+
+def main():
+    parser = argparse.ArgumentParser(description="Train RL agents on Wumpus World")
+    parser.add_argument('--parallel', action='store_true',
+                        help="train every algorithm/seed as its own process pool job")
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0],
+                        help="seeds to train per algorithm in parallel mode")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="process pool size (default: one per job, up to CPU count)")
+    parser.add_argument('--threads-per-job', type=int, default=None,
+                        help="torch threads per job (default: CPU count / workers)")
+    parser.add_argument('--n-envs', type=int, default=1,
+                        help="parallel envs per SB3 algorithm")
+    parser.add_argument('--vec-backend', choices=['auto', 'dummy', 'subprocess', 'batched'],
+                        default='auto',
+                        help=f"how SB3 runs its parallel envs (auto: batched from "
+                             f"{BATCHED_MIN_ENVS} envs, dummy below)")
+    parser.add_argument('--suite', default=None,
+                        help="pre-generated world suite directory shared by every job")
+    parser.add_argument('--demo-episodes', type=int, default=0,
+                        help="oracle episodes used to pre-fill the custom DQN replay memory")
+    parser.add_argument('--record-dir', default=None,
+                        help="record custom DQN training and SB3 evaluation trajectories here")
+    parser.add_argument('--timings', action='store_true',
+                        help="time every phase of the custom DQN loop and write per-episode JSON lines "
+                             "to results/")
+    parser.add_argument('--profile', choices=['cprofile', 'torch'], default=None,
+                        help="run the custom DQN loop under cProfile or torch.profiler")
+    parser.add_argument('--prioritized-replay', action='store_true',
+                        help="sample the custom DQN replay memory by TD error (sum-tree) instead of uniformly")
+    parser.add_argument('--compact-replay', action='store_true',
+                        help="store custom DQN replay states as int8/bit-packed rows (~17x smaller)")
+    parser.add_argument('--network-backend', choices=NETWORK_BACKENDS, default='eager',
+                        help="run the custom DQN networks eagerly, as TorchScript or via torch.compile")
+    parser.add_argument('--fused-optimizer', action='store_true',
+                        help="single-kernel Adam for the custom DQN (CPU needs torch >= 2.4)")
+    parser.add_argument('--actor-learner', action='store_true',
+                        help="train the custom DQN with parallel actor processes feeding one learner")
+    parser.add_argument('--num-actors', type=int, default=4,
+                        help="actor processes for --actor-learner")
+    parser.add_argument('--actor-steps', type=int, default=200000,
+                        help="env steps collected by the actors for --actor-learner")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="torch intra-op threads for a sequential run (default: torch's choice)")
+    parser.add_argument('--interop-threads', type=int, default=None,
+                        help="torch inter-op threads for a sequential run")
+    args = parser.parse_args()
+    
+    print("Starting Wumpus World RL Training\n")
+    create_output_dirs()
+    
+    num_actors = args.num_actors if args.actor_learner else 0
+    if not args.parallel:
+        threads, interop_threads = configure_threads(args.threads, args.interop_threads)
+        print(f"Using {threads} torch threads ({interop_threads} inter-op)")
+    if args.parallel:
+        all_results = run_parallel(args.seeds, args.workers, args.threads_per_job,
+                                   args.n_envs, args.vec_backend, args.suite, args.demo_episodes,
+                                   args.record_dir, args.timings, args.profile,
+                                   args.compact_replay, args.network_backend, num_actors,
+                                   args.actor_steps, args.fused_optimizer, args.prioritized_replay)
+    else:
+        all_results = run_sequential(args.n_envs, args.vec_backend, args.suite,
+                                     args.demo_episodes, args.record_dir, args.timings,
+                                     args.profile, args.compact_replay, args.network_backend,
+                                     num_actors, args.actor_steps, args.fused_optimizer,
+                                     args.prioritized_replay)
     
     # Save results to JSON file
     results_file = 'results/training_results.json'
     os.makedirs('results', exist_ok=True)
     with open(results_file, 'w') as f:
-        json.dump(all_results, f, indent=4)
+        json.dump(all_results, f, indent=4, default=float)
     
     print("\nTraining complete! Results saved to:", results_file)
     print("Use plot_results.py to visualize the results")